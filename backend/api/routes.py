@@ -1,11 +1,27 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Literal, Optional, Tuple
+import asyncio
+import json
 import time
 import logging
 
-from models.post import PostsRequest, PostsResponse, ClusteringRequest, HealthResponse, Post
+from models.post import PostsRequest, ClusteringRequest
+from models.health import ReadinessHealthResponse
+from models.clustering import ClusteredPost
+from models.snapshot import SnapshotPostsResponse
+from models.similar import SimilarPost, SimilarPostsResponse
 from services.telegram_parser import TelegramParser
-from services.clustering_service import ClusteringService
+from services.clustering_service import ClusteringBusyError
+from services.clustering_registry import ClusteringServiceRegistry
+from services.snapshot_scheduler import SnapshotScheduler, normalize_channels
+from services.post_store import PostStore
+from services.post_ingestion import fetch_posts, iter_channel_posts
+from services.vector_index import VectorIndex
+from services.model_registry import embedding_models
+from services.metrics import cache_stats, format_server_timing
+from services.result_cache import ResultCache, SOURCE_COMPUTED, make_cluster_key, make_posts_key
 from utils.channel_loader import load_channels_from_file
 from config.settings import settings
 
@@ -15,18 +31,59 @@ router = APIRouter()
 
 # Инициализируем сервисы
 telegram_parser = TelegramParser()
-clustering_service = ClusteringService()
+post_store = PostStore(
+    db_path=settings.post_store_path,
+    retention_days=settings.post_store_retention_days
+) if settings.post_store_enabled else None
+# Индексируются только посты из хранилища; каталог индекса зависит от модели и бэкенда embeddings
+vector_index = VectorIndex(
+    index_dir=settings.vector_index_dir,
+    model_name=f"{settings.embedding_model}-{settings.embedding_backend}",
+    n_probe=settings.vector_index_n_probe,
+    min_train_size=settings.vector_index_min_train_size,
+    flush_interval_seconds=settings.vector_index_flush_interval_seconds
+) if settings.vector_index_enabled and post_store is not None else None
+# Один сервис на LLM провайдер; сервис провайдера из настроек используется по умолчанию
+clustering_services = ClusteringServiceRegistry(vector_index=vector_index)
+clustering_service = clustering_services.default
+results_cache = ResultCache(
+    ttl_seconds=settings.result_cache_ttl_seconds,
+    max_entries=settings.result_cache_max_entries
+)
 
-@router.get("/health", response_model=HealthResponse)
+# Статистика кэшей для /metrics (кэш embeddings появляется после загрузки модели)
+cache_stats.register("embeddings", lambda: clustering_service.embedding_cache.get_stats() if clustering_service.embedding_cache else None)
+cache_stats.register("cluster_names", lambda: clustering_service.name_cache.get_stats())
+if telegram_parser.page_cache is not None:
+    cache_stats.register("pages", telegram_parser.page_cache.get_stats)
+if vector_index is not None:
+    cache_stats.register("vector_index", vector_index.get_stats)
+cache_stats.register("results", results_cache.get_stats)
+
+# Фоновое обновление снапшота для каналов из config/channels.txt
+snapshot_scheduler = SnapshotScheduler(
+    telegram_parser=telegram_parser,
+    post_store=post_store,
+    get_clustering_service=lambda: clustering_service,
+    interval_seconds=settings.snapshot_refresh_interval_seconds,
+    hours_back=settings.hours_back,
+    posts_limit=settings.posts_limit_per_channel,
+    vector_index=vector_index
+)
+
+@router.get("/health", response_model=ReadinessHealthResponse)
 async def health_check():
     """Проверка состояния API"""
     channels = load_channels_from_file()
+    model_status = embedding_models.status(settings.embedding_model)
     
-    return HealthResponse(
+    return ReadinessHealthResponse(
         status="ok",
         llm_provider=settings.llm_provider,
         llm_available=clustering_service.is_available(),
-        channels_count=len(channels)
+        channels_count=len(channels),
+        embedding_model_status=model_status,
+        ready=model_status == embedding_models.READY
     )
 
 @router.get("/channels")
@@ -35,16 +92,58 @@ async def get_channels():
     channels = load_channels_from_file()
     return {"channels": channels, "count": len(channels)}
 
-@router.post("/posts", response_model=PostsResponse)
-async def get_posts(request: PostsRequest = None):
-    """Получить и кластеризовать посты"""
+async def _fetch_and_cluster(channels: List[str], hours_back: int) -> Tuple[SnapshotPostsResponse, Dict[str, float]]:
+    """Загрузка и кластеризация постов; возвращает ответ и длительности этапов"""
+    start_time = time.time()
+    logger.info(f"Запрос на получение постов из {len(channels)} каналов за последние {hours_back} часов")
+    
+    # Парсим посты
+    stage_timings = {}
+    fetch_started = time.time()
+    raw_posts = await fetch_posts(
+        telegram_parser,
+        post_store,
+        channels=channels,
+        hours_back=hours_back,
+        limit=settings.posts_limit_per_channel
+    )
+    stage_timings["fetch"] = time.time() - fetch_started
+    
+    if not raw_posts:
+        logger.warning("Посты не найдены")
+        return SnapshotPostsResponse(
+            posts=[],
+            total_count=0,
+            channels_processed=len(channels),
+            processing_time_seconds=time.time() - start_time
+        ), stage_timings
+    
+    # Кластеризуем посты
+    cluster_stats = []
+    clustered_posts = await clustering_service.cluster_posts(raw_posts, timings=stage_timings, cluster_stats=cluster_stats)
+    
+    processing_time = time.time() - start_time
+    logger.info(f"Обработка завершена за {processing_time:.2f} секунд "
+                f"({', '.join(f'{stage}: {seconds:.2f}с' for stage, seconds in stage_timings.items())})")
+    
+    return SnapshotPostsResponse(
+        posts=clustered_posts,
+        clusters=cluster_stats,
+        total_count=len(clustered_posts),
+        channels_processed=len(channels),
+        processing_time_seconds=processing_time
+    ), stage_timings
+
+@router.post("/posts", response_model=SnapshotPostsResponse)
+async def get_posts(response: Response, request: PostsRequest = None, force_refresh: bool = False):
+    """Получить и кластеризовать посты (для каналов из файла - из фонового снапшота)"""
     start_time = time.time()
     
     try:
         # Если каналы не переданы в запросе, загружаем из файла
         if request is None or not request.channels:
             channels = load_channels_from_file()
-            hours_back = 24
+            hours_back = settings.hours_back
         else:
             channels = request.channels
             hours_back = request.hours_back
@@ -52,73 +151,205 @@ async def get_posts(request: PostsRequest = None):
         if not channels:
             raise HTTPException(status_code=400, detail="Список каналов пуст")
         
-        logger.info(f"Запрос на получение постов из {len(channels)} каналов за последние {hours_back} часов")
+        # Запрос совпадает с фоновым снапшотом - отвечаем сразу
+        if settings.snapshot_enabled and snapshot_scheduler.matches(channels, hours_back):
+            snapshot = snapshot_scheduler.snapshot
+            if snapshot is None or force_refresh:
+                logger.info("🔄 Снапшот отсутствует или запрошено принудительное обновление")
+                snapshot = await snapshot_scheduler.refresh()
+            
+            if snapshot is not None:
+                if settings.server_timing_enabled:
+                    response.headers["Server-Timing"] = format_server_timing({"snapshot": time.time() - start_time})
+                return SnapshotPostsResponse(
+                    posts=list(snapshot.posts),
+                    clusters=list(snapshot.clusters),
+                    total_count=len(snapshot.posts),
+                    channels_processed=len(channels),
+                    processing_time_seconds=time.time() - start_time,
+                    snapshot_age=snapshot.age_seconds
+                )
         
-        # Парсим посты
-        raw_posts = await telegram_parser.parse_channels(
-            channels=channels,
-            hours_back=hours_back,
-            limit=settings.posts_limit_per_channel
+        # Одинаковые одновременные запросы ждут одно вычисление, повторные в пределах TTL - берутся из кэша;
+        # считаем по нормализованным каналам, чтобы результат не зависел от того, чей запрос пришел первым
+        channels = list(normalize_channels(channels))
+        key = make_posts_key(channels, hours_back)
+        if force_refresh:
+            results_cache.invalidate(key)
+        (posts_response, stage_timings), source = await results_cache.get_or_compute(
+            key, lambda: _fetch_and_cluster(channels, hours_back)
         )
         
-        if not raw_posts:
-            logger.warning("Посты не найдены")
-            return PostsResponse(
-                posts=[],
-                total_count=0,
-                channels_processed=len(channels),
-                processing_time_seconds=time.time() - start_time
-            )
-        
-        # Кластеризуем посты
-        clustered_posts = await clustering_service.cluster_posts(raw_posts)
-        
         processing_time = time.time() - start_time
-        logger.info(f"Обработка завершена за {processing_time:.2f} секунд")
+        if source != SOURCE_COMPUTED:
+            logger.info(f"♻️ Результат для {len(channels)} каналов: {source} ({processing_time:.2f} секунд)")
+            stage_timings = {source: processing_time}
+        if settings.server_timing_enabled:
+            response.headers["Server-Timing"] = format_server_timing({**stage_timings, "total": processing_time})
         
-        return PostsResponse(
-            posts=clustered_posts,
-            total_count=len(clustered_posts),
-            channels_processed=len(channels),
-            processing_time_seconds=processing_time
-        )
+        return posts_response.model_copy(update={"processing_time_seconds": processing_time})
         
+    except HTTPException:
+        raise
+    except ClusteringBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Ошибка при получении постов: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ошибка сервера: {str(e)}")
 
-@router.post("/cluster", response_model=List[Post])
+def _format_event(event: str, payload: dict, stream_format: str) -> str:
+    """Событие потока в формате NDJSON или Server-Sent Events"""
+    data = json.dumps(jsonable_encoder({"event": event, **payload}), ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@router.post("/posts/stream")
+async def stream_posts(request: PostsRequest = None, stream_format: Literal["ndjson", "sse"] = "ndjson"):
+    """Потоковая выдача: посты каждого канала по мере загрузки, затем событие с результатом кластеризации"""
+    if request is None or not request.channels:
+        channels = load_channels_from_file()
+        hours_back = settings.hours_back
+    else:
+        channels = request.channels
+        hours_back = request.hours_back
+    
+    if not channels:
+        raise HTTPException(status_code=400, detail="Список каналов пуст")
+    
+    async def events():
+        start_time = time.time()
+        
+        # Готовый снапшот отдаем сразу одним событием
+        snapshot = snapshot_scheduler.snapshot
+        if settings.snapshot_enabled and snapshot is not None and snapshot_scheduler.matches(channels, hours_back):
+            yield _format_event("clustering", {
+                "posts": list(snapshot.posts),
+                "clusters": list(snapshot.clusters),
+                "total_count": len(snapshot.posts),
+                "channels_processed": len(channels),
+                "processing_time_seconds": time.time() - start_time,
+                "snapshot_age": snapshot.age_seconds
+            }, stream_format)
+            return
+        
+        raw_posts = []
+        channels_processed = 0
+        async for channel, posts, error in iter_channel_posts(
+            telegram_parser,
+            post_store,
+            channels=channels,
+            hours_back=hours_back,
+            limit=settings.posts_limit_per_channel
+        ):
+            channels_processed += 1
+            raw_posts.extend(posts)
+            yield _format_event("channel", {
+                "channel": channel,
+                "posts": posts,
+                "count": len(posts),
+                "error": error,
+                "channels_processed": channels_processed,
+                "channels_total": len(channels)
+            }, stream_format)
+        
+        try:
+            cluster_stats = []
+            clustered_posts = await clustering_service.cluster_posts(raw_posts, cluster_stats=cluster_stats) if raw_posts else []
+        except ClusteringBusyError as e:
+            yield _format_event("error", {"detail": str(e)}, stream_format)
+            return
+        except Exception as e:
+            logger.error(f"Ошибка при кластеризации потока: {str(e)}")
+            yield _format_event("error", {"detail": f"Ошибка кластеризации: {str(e)}"}, stream_format)
+            return
+        
+        yield _format_event("clustering", {
+            "posts": clustered_posts,
+            "clusters": cluster_stats,
+            "total_count": len(clustered_posts),
+            "channels_processed": len(channels),
+            "processing_time_seconds": time.time() - start_time
+        }, stream_format)
+    
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@router.post("/cluster", response_model=List[ClusteredPost])
 async def cluster_posts(request: ClusteringRequest):
     """Кластеризовать уже полученные посты"""
     try:
         logger.info(f"Запрос на кластеризацию {len(request.posts)} постов")
         
-        # Если указан провайдер, временно переключаемся на него
-        original_provider = settings.llm_provider
-        if request.provider and request.provider != settings.llm_provider:
-            settings.llm_provider = request.provider
-            # Переинициализируем сервис кластеризации
-            global clustering_service
-            clustering_service = ClusteringService()
-        
+        # Сервис выбранного провайдера; глобальные настройки не меняются
         try:
-            clustered_posts = await clustering_service.cluster_posts(request.posts)
-            return clustered_posts
-        finally:
-            # Возвращаем оригинальный провайдер
-            if request.provider and request.provider != original_provider:
-                settings.llm_provider = original_provider
-                clustering_service = ClusteringService()
+            service = clustering_services.get(request.provider)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
+        clustered_posts, _ = await results_cache.get_or_compute(
+            make_cluster_key(request.posts, service.llm_provider),
+            lambda: service.cluster_posts(request.posts, index_posts=False)
+        )
+        return clustered_posts
+        
+    except HTTPException:
+        raise
+    except ClusteringBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Ошибка при кластеризации: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ошибка кластеризации: {str(e)}")
 
+@router.get("/similar", response_model=SimilarPostsResponse)
+async def get_similar_posts(post_id: Optional[str] = None, text: Optional[str] = None, k: int = 10):
+    """Похожие посты из сохраненной истории (по id поста или по произвольному тексту)"""
+    start_time = time.time()
+    
+    if vector_index is None or post_store is None:
+        raise HTTPException(status_code=503, detail="Поиск похожих постов требует включенных индекса и хранилища постов")
+    if not post_id and not text:
+        raise HTTPException(status_code=400, detail="Укажите post_id или text")
+    k = max(1, min(k, 100))
+    
+    try:
+        if post_id:
+            query = vector_index.get_vector(post_id)
+            if query is None:
+                raise HTTPException(status_code=404, detail=f"Пост {post_id} отсутствует в индексе")
+        else:
+            query = (await clustering_service.encode_texts([text]))[0]
+        
+        matches = await asyncio.to_thread(vector_index.search, query, k, [post_id] if post_id else None)
+        posts = await asyncio.to_thread(post_store.get_posts, [match_id for match_id, _ in matches])
+        
+        # Посты, удаленные из хранилища по сроку хранения, пропускаем
+        results = [
+            SimilarPost(**posts[match_id].dict(), score=score)
+            for match_id, score in matches
+            if match_id in posts
+        ]
+        
+        return SimilarPostsResponse(
+            query_post_id=post_id,
+            query_text=text if not post_id else None,
+            results=results,
+            index_size=len(vector_index),
+            processing_time_seconds=time.time() - start_time
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка поиска похожих постов: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ошибка поиска похожих постов: {str(e)}")
+
 @router.get("/providers")
 async def get_providers():
     """Получить информацию о доступных LLM провайдерах"""
     providers = {
         "current": clustering_service.get_provider_info(),
+        "active": clustering_services.providers(),
         "available": [
             {
                 "name": "openai",
@@ -0,0 +1,81 @@
+"""Бенчмарк алгоритмов кластеризации на синтетических embeddings.
+
+Запуск из каталога backend:
+    python -m benchmarks.clustering_backends --sizes 1000 10000 100000
+"""
+from typing import List
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from services.clustering_backends import HDBSCAN_AVAILABLE, NOISE_LABEL, fit_hdbscan, select_minibatch_model
+from services.model_selection import select_kmeans_model
+
+BACKENDS = ["kmeans", "minibatch", "hdbscan"]
+
+
+def make_embeddings(n: int, dim: int = 384, n_topics: int = 12, noise_share: float = 0.1, seed: int = 42) -> np.ndarray:
+    """Нормализованные embeddings: гауссовы темы плюс доля случайного шума"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim))
+    n_noise = int(n * noise_share)
+    clustered = topics[rng.integers(0, n_topics, n - n_noise)] + 0.35 * rng.standard_normal((n - n_noise, dim))
+    noise = rng.standard_normal((n_noise, dim))
+    embeddings = np.vstack([clustered, noise]).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def run_backend(backend: str, embeddings: np.ndarray, candidate_ks: List[int]) -> dict:
+    """Время и пиковая память (tracemalloc) одного запуска"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    if backend == "kmeans":
+        selection = select_kmeans_model(embeddings, candidate_ks)
+    elif backend == "minibatch":
+        selection = select_minibatch_model(embeddings, candidate_ks)
+    else:
+        selection = fit_hdbscan(embeddings)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "backend": backend,
+        "n": len(embeddings),
+        "seconds": round(seconds, 3),
+        "peak_memory_mb": round(peak / 2 ** 20, 1),
+        "clusters": selection.k if selection else 1,
+        "noise": int((selection.labels == NOISE_LABEL).sum()) if selection else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--min-clusters", type=int, default=2)
+    parser.add_argument("--max-clusters", type=int, default=8)
+    args = parser.parse_args()
+
+    candidate_ks = list(range(args.min_clusters, args.max_clusters + 1))
+    results = []
+    for n in args.sizes:
+        embeddings = make_embeddings(n, dim=args.dim)
+        for backend in args.backends:
+            if backend == "hdbscan" and not HDBSCAN_AVAILABLE:
+                continue
+            result = run_backend(backend, embeddings, candidate_ks)
+            print(f"{backend:>10} n={n:<7} {result['seconds']:>8.2f}s {result['peak_memory_mb']:>8.1f}MB "
+                  f"clusters={result['clusters']} noise={result['noise']}", file=sys.stderr)
+            results.append(result)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
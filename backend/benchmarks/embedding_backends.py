@@ -0,0 +1,107 @@
+"""Сравнение бэкендов embeddings: паритет с эталонной моделью и пропускная способность.
+
+Запуск из каталога backend (код возврата 1, если косинусная близость ниже --min-cosine;
+2, если модель не загружена и проверка пропущена без --allow-skip):
+    python -m benchmarks.embedding_backends --backend onnx --onnx-file onnx/model_qint8_avx512_vnni.onnx
+"""
+from typing import List, Optional
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+
+from services.embedding_backends import BACKENDS, EmbeddingEncoder, load_encoder
+
+WORDS = ("модель нейросеть релиз обучение данные агент бенчмарк open source inference токены "
+         "контекст стартап инвестиции вакансия python статья исследование GPU квантизация").split()
+
+
+def make_texts(n: int, seed: int = 42) -> List[str]:
+    """Тексты разной длины, похожие на посты каналов"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 200))) for _ in range(n)]
+
+
+def measure(encoder: EmbeddingEncoder, texts: List[str]) -> tuple:
+    """Embeddings и тексты в секунду (после прогревочного батча)"""
+    encoder.encode(texts[:8])
+    started = time.perf_counter()
+    embeddings = encoder.encode(texts)
+    return embeddings, len(texts) / (time.perf_counter() - started)
+
+
+def missing_model_files(model_path: Optional[str], backend: str, onnx_file: Optional[str]) -> Optional[str]:
+    """Описание отсутствующих файлов локальной модели или None"""
+    if model_path is None:
+        return None
+    if not os.path.isdir(model_path):
+        return f"нет каталога модели {model_path}"
+    if backend == "onnx":
+        onnx_path = os.path.join(model_path, onnx_file or os.path.join("onnx", "model.onnx"))
+        if not os.path.exists(onnx_path):
+            return f"нет файла {onnx_path}"
+    return None
+
+
+def skip(reason: str, allow_skip: bool):
+    """Пропуск проверки паритета: без --allow-skip это ошибка, а не успех"""
+    print(f"{reason} - проверка паритета пропущена")
+    if not allow_skip:
+        sys.exit(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--backend", choices=BACKENDS, default="onnx")
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="порог паритета с эталонной моделью")
+    parser.add_argument("--allow-skip", action="store_true", help="код возврата 0, если модель недоступна и проверка пропущена")
+    args = parser.parse_args()
+
+    missing = missing_model_files(args.model_path, args.backend, args.onnx_file)
+    if missing is not None:
+        skip(missing, args.allow_skip)
+        return
+
+    texts = make_texts(args.texts)
+    try:
+        reference = load_encoder(args.model, "torch", args.model_path, batch_size=args.batch_size, threads=args.threads)
+        candidate = load_encoder(args.model, args.backend, args.model_path, args.onnx_file, args.batch_size, args.threads)
+    except (ImportError, OSError) as e:
+        # Нет пакетов бэкенда или модель недоступна без сети
+        skip(f"модель {args.model} ({args.backend}) не загружена: {e}", args.allow_skip)
+        return
+
+    reference_embeddings, reference_rate = measure(reference, texts)
+    candidate_embeddings, candidate_rate = measure(candidate, texts)
+
+    cosine = np.einsum("ij,ij->i", reference_embeddings, candidate_embeddings) / (
+        np.linalg.norm(reference_embeddings, axis=1) * np.linalg.norm(candidate_embeddings, axis=1)
+    )
+    result = {
+        "backend": args.backend,
+        "texts": len(texts),
+        "reference_texts_per_second": round(reference_rate, 1),
+        "backend_texts_per_second": round(candidate_rate, 1),
+        "speedup": round(candidate_rate / reference_rate, 2),
+        "cosine_mean": float(cosine.mean()),
+        "cosine_min": float(cosine.min()),
+        "parity": bool(cosine.min() >= args.min_cosine),
+    }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if not result["parity"]:
+        print(f"❌ Минимальная косинусная близость {result['cosine_min']:.4f} ниже порога {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Паритет бэкендов разбора HTML: lxml и BeautifulSoup должны давать одинаковые посты на одних и тех же страницах.
+
+Запуск из каталога backend (код возврата 1 при расхождении):
+    python -m benchmarks.extractor_parity
+    python -m benchmarks.extractor_parity --recorded-only
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import sys
+
+from benchmarks.fixtures import RECORD_HINT, generate_channels, load_expected, load_recorded, serialize_page
+from services.html_extractors import LXML_AVAILABLE, BeautifulSoupExtractor, LxmlExtractor
+
+# Разметка, которой нет в синтетических страницах: форматирование, медиа, посты без времени и ссылки, авторизация
+EDGE_CASE_PAGES = {
+    "formatting": (
+        '<section class="tgme_channel_history">'
+        '<div class="tgme_widget_message" data-post="edge/10"><div class="tgme_widget_message_text">'
+        'Заголовок<br/><b>жирный</b> и <i>курсив</i><div>блок</div><p>абзац</p><p> </p>хвост  с   пробелами'
+        '<script>skip()</script><a href="https://example.com">ссылка</a></div>'
+        '<a class="tgme_widget_message_date" href="https://t.me/edge/10"><time datetime="2024-05-01T10:00:00+00:00"></time></a></div>'
+        '<div class="tgme_widget_message" data-post="edge/11"><a class="tgme_widget_message_photo_wrap" href="#"></a>'
+        '<div class="tgme_widget_message_text">Пост с фотографией</div>'
+        '<a class="tgme_widget_message_date" href="https://t.me/edge/11"><time datetime="2024-05-01T11:00:00Z"></time></a></div>'
+        '<div class="tgme_widget_message" data-post="edge/12"><div class="tgme_widget_message_text">Пост без времени публикации</div>'
+        '<a class="tgme_widget_message_date" href="https://t.me/edge/12"></a></div>'
+        '<div class="tgme_widget_message" data-post="edge/13"><div class="tgme_widget_message_text">Пост без ссылки на себя</div></div>'
+        '<div class="tgme_widget_message" data-post="edge/14"><video></video>'
+        '<div class="tgme_widget_message_text">Видео без часового пояса</div>'
+        '<a class="tgme_widget_message_date" href="https://t.me/edge/14"><time datetime="2024-05-01T12:00:05"></time></a></div>'
+        '</section>'
+    ),
+    "auth": '<div class="tgme_page"><a class="tgme_action_button_new" href="tg://resolve?domain=edge">View in Telegram</a></div>',
+    "empty": "<html><body></body></html>",
+}
+
+
+def compare_page(html: str, channel: str, reference: BeautifulSoupExtractor, candidate: LxmlExtractor) -> Optional[str]:
+    """Описание первого расхождения или None"""
+    expected = reference.extract_page(html, channel)
+    actual = candidate.extract_page(html, channel)
+    for key in expected:
+        if key == "posts":
+            continue
+        if expected[key] != actual[key]:
+            return f"{key}: bs4={expected[key]!r} lxml={actual[key]!r}"
+    if len(expected["posts"]) != len(actual["posts"]):
+        return f"постов: bs4={len(expected['posts'])} lxml={len(actual['posts'])}"
+    for expected_post, actual_post in zip(expected["posts"], actual["posts"]):
+        if expected_post != actual_post:
+            return f"пост {expected_post.id}: bs4={expected_post!r} lxml={actual_post!r}"
+    return None
+
+
+def compare_recorded(recorded: Dict[str, Dict[Optional[int], str]], expected: Dict[str, Dict[Optional[int], dict]],
+                     reference: BeautifulSoupExtractor) -> List[str]:
+    """Расхождения разбора записанных страниц с разбором, сохраненным при записи"""
+    failures = []
+    for channel, channel_pages in recorded.items():
+        for before, html in channel_pages.items():
+            saved = expected.get(channel, {}).get(before)
+            if saved is not None and serialize_page(reference.extract_page(html, channel)) != saved:
+                failures.append(f"recorded:{channel} before={before}: разбор отличается от сохраненного при записи")
+    return failures
+
+
+def collect_pages(recorded: Dict[str, Dict[Optional[int], str]], recorded_only: bool) -> List[Tuple[str, str, str]]:
+    """(источник, канал, HTML) для проверки"""
+    pages = [(f"recorded:{channel}", channel, html) for channel, channel_pages in recorded.items() for html in channel_pages.values()]
+    if not recorded_only:
+        pages += [("edge:" + name, "edge", html) for name, html in EDGE_CASE_PAGES.items()]
+        channels: Dict[str, Dict[Optional[int], str]] = generate_channels(300, 5, seed=7)
+        pages += [(f"synthetic:{channel}", channel, html) for channel, channel_pages in channels.items() for html in channel_pages.values()]
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recorded-only", action="store_true", help="только записанные страницы из benchmarks/fixtures")
+    args = parser.parse_args()
+
+    if not LXML_AVAILABLE:
+        print("lxml не установлен - проверка пропущена")
+        return
+
+    recorded = load_recorded()
+    if args.recorded_only and not recorded:
+        print(f"❌ Нет записанных страниц в benchmarks/fixtures - {RECORD_HINT}")
+        sys.exit(1)
+
+    reference, candidate = BeautifulSoupExtractor(), LxmlExtractor()
+    pages = collect_pages(recorded, args.recorded_only)
+    failures = compare_recorded(recorded, load_expected(), reference)
+    for source, channel, html in pages:
+        mismatch = compare_page(html, channel, reference, candidate)
+        if mismatch is not None:
+            failures.append(f"{source}: {mismatch}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    print(f"Проверено страниц: {len(pages)}, расхождений: {len(failures)}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
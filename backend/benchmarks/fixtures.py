@@ -0,0 +1,216 @@
+"""Страницы t.me/s/ для бенчмарков: синтетическая генерация, запись настоящих страниц и локальный сервер.
+
+Запись страниц каналов (из каталога backend):
+    python -m benchmarks.fixtures --record seeallochnaya data_secrets --pages 3
+
+Рядом с каждой страницей <страница>.html сохраняется ее разбор <страница>.json - с ним сверяется extractor_parity.
+В репозитории записана только страница-превью канала без постов (ai_machinelearning), для --recorded нужна своя запись.
+"""
+from datetime import datetime, timedelta, timezone
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import random
+import threading
+
+import httpx
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RECORD_HINT = "запишите страницы каналов: python -m benchmarks.fixtures --record <каналы>"
+POSTS_PER_PAGE = 20
+
+TOPICS = {
+    "models": "модель релиз веса параметров контекст бенчмарк open source MoE reasoning токены",
+    "jobs": "вакансия ищем разработчик команда удаленка зарплата python backend senior стек",
+    "crypto": "биткоин курс биржа блокчейн токен ethereum рост падение ликвидность ETF",
+    "research": "статья исследование arxiv эксперимент датасет метрика абляция авторы результаты",
+    "events": "конференция митап доклад регистрация спикеры программа онлайн запись встреча",
+}
+
+
+def make_post_text(rng: random.Random) -> str:
+    """Синтетический текст поста: тема + случайный шум, от пары строк до длинного лонгрида"""
+    topic_words = TOPICS[rng.choice(list(TOPICS))].split()
+    noise_words = [word for words in TOPICS.values() for word in words.split()]
+    words = [rng.choice(topic_words) if rng.random() < 0.7 else rng.choice(noise_words) for _ in range(rng.randint(8, 250))]
+    return " ".join(words).capitalize()
+
+
+def render_page(channel: str, posts: List[dict]) -> str:
+    """HTML в разметке t.me/s/<channel>"""
+    items = []
+    for post in posts:
+        paragraphs = "<br/>".join(escape(line) for line in post["text"].split("\n"))
+        items.append(
+            f'<div class="tgme_widget_message_wrap"><div class="tgme_widget_message text_not_supported_wrap" '
+            f'data-post="{channel}/{post["id"]}"><div class="tgme_widget_message_bubble">'
+            f'<div class="tgme_widget_message_text js-message_text" dir="auto">{paragraphs}</div>'
+            f'<div class="tgme_widget_message_footer"><a class="tgme_widget_message_date" '
+            f'href="https://t.me/{channel}/{post["id"]}"><time datetime="{post["datetime"]}" class="time"></time></a>'
+            f'</div></div></div></div>'
+        )
+    return f'<!DOCTYPE html><html><head><title>{channel}</title></head><body><section class="tgme_channel_history">{"".join(items)}</section></body></html>'
+
+
+def generate_channels(total_posts: int, n_channels: int, hours_back: int = 24, seed: int = 42) -> Dict[str, Dict[Optional[int], str]]:
+    """Синтетические каналы: канал -> {курсор before (None - первая страница) -> HTML}"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    per_channel = max(1, total_posts // n_channels)
+    channels = {}
+
+    for c in range(n_channels):
+        channel = f"bench_channel_{c}"
+        count = per_channel + (1 if c < total_posts - per_channel * n_channels else 0)
+        # Посты равномерно распределены по окну; id растут со временем
+        step = hours_back * 3600 / (count + 1)
+        posts = [
+            {
+                "id": i + 1,
+                "text": make_post_text(rng),
+                "datetime": (now - timedelta(seconds=step * (count - i))).replace(microsecond=0).isoformat(),
+            }
+            for i in range(count)
+        ]
+
+        pages = {}
+        end = len(posts)
+        before = None
+        while end > 0:
+            start = max(0, end - POSTS_PER_PAGE)
+            pages[before] = render_page(channel, posts[start:end])
+            before = posts[start]["id"]
+            end = start
+        channels[channel] = pages
+
+    return channels
+
+
+def page_file_name(before: Optional[int]) -> str:
+    """Имя файла страницы без расширения: latest или before_<id>"""
+    return "latest" if before is None else f"before_{before}"
+
+
+def serialize_page(page: dict) -> dict:
+    """Результат разбора страницы в JSON-совместимом виде"""
+    oldest_post_time = page["oldest_post_time"]
+    return {
+        **page,
+        "posts": [post._asdict() for post in page["posts"]],
+        "oldest_post_time": oldest_post_time.isoformat() if oldest_post_time is not None else None,
+    }
+
+
+def _load_pages(fixtures_dir: str, extension: str, read) -> Dict[str, Dict[Optional[int], object]]:
+    """Файлы записанных страниц с расширением extension: канал -> {курсор before -> read(файл)}"""
+    channels = {}
+    if not os.path.isdir(fixtures_dir):
+        return channels
+    for channel in sorted(os.listdir(fixtures_dir)):
+        channel_dir = os.path.join(fixtures_dir, channel)
+        if not os.path.isdir(channel_dir):
+            continue
+        pages = {}
+        for file_name in os.listdir(channel_dir):
+            if not file_name.endswith(extension):
+                continue
+            stem = file_name[:-len(extension)]
+            before = None if stem == "latest" else int(stem.split("_", 1)[1])
+            with open(os.path.join(channel_dir, file_name), "r", encoding="utf-8") as f:
+                pages[before] = read(f)
+        channels[channel] = pages
+    return channels
+
+
+def load_recorded(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Dict[Optional[int], str]]:
+    """Записанные страницы: <dir>/<channel>/latest.html и before_<id>.html"""
+    return _load_pages(fixtures_dir, ".html", lambda f: f.read())
+
+
+def load_expected(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Dict[Optional[int], dict]]:
+    """Разбор записанных страниц на момент записи: <dir>/<channel>/latest.json и before_<id>.json"""
+    return _load_pages(fixtures_dir, ".json", json.load)
+
+
+def record(channels: List[str], pages: int = 3, fixtures_dir: str = FIXTURES_DIR, base_url: str = "https://t.me"):
+    """Сохранение настоящих страниц каналов для последующего воспроизведения"""
+    from services.html_extractors import extract_page
+
+    with httpx.Client(timeout=30.0, follow_redirects=True) as client:
+        for channel in channels:
+            channel_dir = os.path.join(fixtures_dir, channel)
+            os.makedirs(channel_dir, exist_ok=True)
+            before = None
+            for _ in range(pages):
+                url = f"{base_url}/s/{channel}" + (f"?before={before}" if before else "")
+                response = client.get(url)
+                response.raise_for_status()
+                name = page_file_name(before)
+                with open(os.path.join(channel_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+                    f.write(response.text)
+                page = extract_page(response.text, channel)
+                with open(os.path.join(channel_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                    json.dump(serialize_page(page), f, ensure_ascii=False, indent=2)
+                before = page["oldest_post_id"]
+                if not before or before <= 1:
+                    break
+            print(f"{channel}: записано в {channel_dir}")
+
+
+class FixtureServer:
+    """Локальная замена t.me: отдает /s/<channel>?before=<id> из словаря страниц"""
+
+    def __init__(self, channels: Dict[str, Dict[Optional[int], str]], host: str = "127.0.0.1", port: int = 0):
+        pages = channels
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                channel = url.path.rstrip("/").split("/")[-1]
+                before = parse_qs(url.query).get("before", [None])[0]
+                html = pages.get(channel, {}).get(int(before) if before else None)
+                if html is None:
+                    # За пределами записанных страниц - пустая страница, как у t.me в начале канала
+                    html = render_page(channel, [])
+                body = html.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", nargs="+", metavar="CHANNEL", required=True)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    record(args.record, args.pages, args.fixtures_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Скорость keyword-классификации: KeywordMatcher против прежнего поиска подстрок, плюс совпадение результатов бэкендов.
+
+Запуск из каталога backend (код возврата 1, если regex и Ахо-Корасик дают разные очки):
+    python -m benchmarks.keyword_matcher
+    python -m benchmarks.keyword_matcher --words 30 150 --texts 20000 --keyword-share 0.3
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks.fixtures import TOPICS
+from services.keyword_matcher import (
+    AHOCORASICK_AVAILABLE, DEFAULT_KEYWORD_CLUSTERS, NO_TEXT_CLUSTER_NAME, UNCATEGORIZED_CLUSTER_NAME, KeywordMatcher
+)
+
+# Слова без ключевых: из них состоит основная часть текста поста
+FILLER_WORDS = (
+    "сегодня рассказываем новый очень который можно чтобы если уже еще время люди также между после команда "
+    "вышел показали пишут подробнее ссылка внутри больше меньше первый лучший главное итоги неделя проект"
+).split()
+TOPIC_WORDS = [word for words in TOPICS.values() for word in words.split()] + ["ChatGPT", "OpenAI", "ИИ-агенты", "курсы"]
+
+
+def make_texts(n: int, words: int, keyword_share: float, seed: int = 42) -> List[str]:
+    """Посты из words слов: доля keyword_share - слова тем (часть из них - ключевые), остальное - нейтральные"""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(TOPIC_WORDS) if rng.random() < keyword_share else rng.choice(FILLER_WORDS) for _ in range(words)).capitalize()
+        for _ in range(n)
+    ]
+
+
+def first_hit(text: Optional[str]) -> str:
+    """Прежний fallback: первая категория, в тексте которой встретилась подстрока"""
+    if not text:
+        return NO_TEXT_CLUSTER_NAME
+    text_lower = text.lower()
+    for cluster_name, keywords in DEFAULT_KEYWORD_CLUSTERS.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return cluster_name
+    return UNCATEGORIZED_CLUSTER_NAME
+
+
+def collect_all(text: Optional[str]) -> str:
+    """Подсчет всех вхождений циклом по подстрокам - та же задача, что у KeywordMatcher, без компиляции"""
+    if not text:
+        return NO_TEXT_CLUSTER_NAME
+    text_lower = text.lower()
+    scores: Dict[str, int] = {}
+    for cluster_name, keywords in DEFAULT_KEYWORD_CLUSTERS.items():
+        for keyword in keywords:
+            count = text_lower.count(keyword)
+            if count:
+                scores[cluster_name] = scores.get(cluster_name, 0) + count
+    return max(scores, key=scores.get) if scores else UNCATEGORIZED_CLUSTER_NAME
+
+
+def measure(classify: Callable[[Optional[str]], str], texts: List[str], repeats: int) -> float:
+    """Лучшая из repeats пропускная способность, постов в секунду"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for text in texts:
+            classify(text)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[30, 150], help="длина поста в словах")
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--keyword-share", type=float, default=0.3, help="доля слов из тем")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    methods = {"first_hit": first_hit, "collect_all": collect_all}
+    regex = KeywordMatcher(DEFAULT_KEYWORD_CLUSTERS, backend="regex")
+    methods["regex"] = regex.classify
+    if AHOCORASICK_AVAILABLE:
+        automaton = KeywordMatcher(DEFAULT_KEYWORD_CLUSTERS, backend="ahocorasick")
+        methods["ahocorasick"] = automaton.classify
+    else:
+        print("pyahocorasick не установлен - замер только regex бэкенда", file=sys.stderr)
+
+    matchers = [name for name in methods if name not in ("first_hit", "collect_all")]
+    results = []
+    for words in args.words:
+        texts = make_texts(args.texts, words, args.keyword_share)
+        rates = {name: measure(classify, texts, args.repeats) for name, classify in methods.items()}
+        result = {
+            "words": words,
+            "posts_per_second": {name: round(rate) for name, rate in rates.items()},
+            "speedup_vs_first_hit": {name: round(rates[name] / rates["first_hit"], 2) for name in matchers},
+            "speedup_vs_collect_all": {name: round(rates[name] / rates["collect_all"], 2) for name in matchers},
+        }
+        if AHOCORASICK_AVAILABLE:
+            # Оба бэкенда должны давать одинаковые очки категорий
+            result["backend_mismatches"] = sum(regex.match(text) != automaton.match(text) for text in texts)
+        results.append(result)
+
+    json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    if any(result.get("backend_mismatches") for result in results):
+        print("❌ Бэкенды KeywordMatcher дают разные результаты")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Проверка именования кластеров на заглушке LLM: параллельность по кластерам, кэш названий и уникальность названий.
+
+Запуск из каталога backend (код возврата 1 при нарушении):
+    python -m benchmarks.llm_naming
+    python -m benchmarks.llm_naming --clusters 24 --concurrency 6 --latency 0.1
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.stub_llm import StubLLMServer
+from config.settings import settings
+
+
+def make_representatives(n_clusters: int, run: str) -> Dict[int, List[str]]:
+    """Репрезентативные посты: у каждого кластера свои"""
+    return {
+        cluster_id: [f"{run}: пост {post} кластера {cluster_id} про новую модель и ее релиз" for post in range(3)]
+        for cluster_id in range(n_clusters)
+    }
+
+
+def configure(llm_server: StubLLMServer, concurrency: int):
+    """OpenAI-совместимый клиент на заглушке"""
+    settings.llm_provider = "openai"
+    settings.openai_api_key = "benchmark"
+    settings.openai_base_url = llm_server.base_url
+    settings.llm_naming_concurrency = concurrency
+    settings.max_concurrent_requests = max(settings.max_concurrent_requests, concurrency)
+
+
+def check_concurrency_and_cache(n_clusters: int, concurrency: int, latency: float) -> List[str]:
+    """Одновременно не больше concurrency запросов, повторное именование - из кэша"""
+    from services.clustering_service import ClusteringService
+
+    failures = []
+    with StubLLMServer(latency=latency) as llm_server:
+        configure(llm_server, concurrency)
+        service = ClusteringService(llm_provider="openai")
+        representatives = make_representatives(n_clusters, "cache")
+
+        started = time.perf_counter()
+        names = asyncio.run(service._generate_cluster_names_with_llm(representatives))
+        elapsed = time.perf_counter() - started
+        print(f"Первый проход: {llm_server.requests} запросов за {elapsed:.2f}с, одновременно до {llm_server.max_in_flight}")
+
+        if llm_server.requests != n_clusters:
+            failures.append(f"запросов {llm_server.requests}, ожидалось {n_clusters}")
+        if llm_server.max_in_flight != min(concurrency, n_clusters):
+            failures.append(f"одновременно {llm_server.max_in_flight} запросов, ожидалось {min(concurrency, n_clusters)}")
+        sequential = n_clusters * latency
+        if elapsed >= sequential * 0.75:
+            failures.append(f"именование заняло {elapsed:.2f}с - почти как последовательное ({sequential:.2f}с)")
+        if any(name.startswith("Кластер ") for name in names.values()):
+            failures.append("часть кластеров получила fallback названия")
+
+        requests_before = llm_server.requests
+        cached_names = asyncio.run(service._generate_cluster_names_with_llm(representatives))
+        print(f"Повторный проход: {llm_server.requests - requests_before} запросов")
+        if llm_server.requests != requests_before:
+            failures.append(f"повторное именование отправило {llm_server.requests - requests_before} запросов вместо 0")
+        if cached_names != names:
+            failures.append("названия из кэша отличаются от исходных")
+    return failures
+
+
+def check_unique_names(n_clusters: int, concurrency: int) -> List[str]:
+    """Одинаковые ответы LLM превращаются в разные названия"""
+    from services.clustering_service import ClusteringService
+
+    failures = []
+    with StubLLMServer(latency=0.0, name="Одна тема") as llm_server:
+        configure(llm_server, concurrency)
+        service = ClusteringService(llm_provider="openai")
+        names = asyncio.run(service._name_clusters(make_representatives(n_clusters, "unique"), {}))
+        print(f"Названия при одинаковых ответах: {sorted(names.values())}")
+        if len(set(names.values())) != len(names):
+            failures.append(f"повторяющиеся названия: {sorted(names.values())}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clusters", type=int, default=12, help="число кластеров")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM_NAMING_CONCURRENCY")
+    parser.add_argument("--latency", type=float, default=0.2, help="задержка ответа заглушки, с")
+    args = parser.parse_args()
+
+    failures = check_concurrency_and_cache(args.clusters, args.concurrency, args.latency)
+    failures += check_unique_names(args.clusters, args.concurrency)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    print(f"Нарушений: {len(failures)}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Сквозной бенчмарк конвейера: загрузка, разбор, embeddings, кластеризация и именование по этапам.
+
+Запуск из каталога backend (результат - JSON для сравнения между коммитами):
+    python -m benchmarks.pipeline --sizes 50 500 5000 50000 --output bench.json
+    python -m benchmarks.pipeline --recorded --output bench_recorded.json
+"""
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+from benchmarks.clustering_backends import make_embeddings
+from benchmarks.fixtures import RECORD_HINT, FixtureServer, generate_channels, load_recorded
+from benchmarks.stub_llm import StubLLMServer
+from config.settings import settings
+from services.html_extractors import extract_page
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def configure(fixture_url: str, llm_server: StubLLMServer, llm_provider: str, posts_per_channel: int):
+    """Настройки, изолирующие бенчмарк от сети, кэшей и хранилища"""
+    settings.telegram_base_url = fixture_url
+    settings.posts_limit_per_channel = posts_per_channel
+    settings.max_pages_per_channel = posts_per_channel // 20 + 2
+    settings.page_cache_enabled = False
+    settings.embedding_cache_enabled = False
+    settings.dedup_enabled = False
+    settings.llm_provider = llm_provider
+    settings.openai_api_key = "benchmark"
+    settings.openai_base_url = llm_server.base_url
+    settings.ollama_base_url = llm_server.root_url
+
+
+class StageTimer:
+    """Замер этапов; ошибка этапа записывается, а не прерывает прогон"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    async def run(self, stage: str, func: Callable, *args):
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        except Exception as e:
+            self.errors[stage] = f"{e.__class__.__name__}: {e}"
+            return None
+        finally:
+            self.stages[stage] = round(time.perf_counter() - started, 4)
+
+
+async def fetch_all(telegram_parser, channels: Dict[str, Dict[Optional[int], str]]) -> List[str]:
+    """Только загрузка всех страниц (без разбора)"""
+    urls = [
+        f"{settings.telegram_base_url}/s/{channel}" + (f"?before={before}" if before else "")
+        for channel, pages in channels.items()
+        for before in pages
+    ]
+    responses = await asyncio.gather(*[telegram_parser._fetch(url) for url in urls])
+    return [response.text for response in responses]
+
+
+def parse_all(channels: Dict[str, Dict[Optional[int], str]]) -> int:
+    """Только разбор страниц выбранным бэкендом (lxml или BeautifulSoup) в текущем потоке"""
+    from services.html_extractors import extract_page
+
+    return sum(
+        len(extract_page(html, channel, settings.html_extractor)["posts"])
+        for channel, pages in channels.items()
+        for html in pages.values()
+    )
+
+
+async def run_scale(channels: Dict[str, Dict[Optional[int], str]], posts_per_channel: int, llm_latency: float, llm_provider: str) -> dict:
+    from services.telegram_parser import TelegramParser
+    from services.clustering_service import ClusteringService
+    from services.cluster_summary import summarize_clusters
+
+    timer = StageTimer()
+    with FixtureServer(channels) as fixture_server, StubLLMServer(latency=llm_latency) as llm_server:
+        configure(fixture_server.base_url, llm_server, llm_provider, posts_per_channel)
+        telegram_parser = TelegramParser()
+        try:
+            await timer.run("fetch", fetch_all, telegram_parser, channels)
+            await timer.run("parse", parse_all, channels)
+            raw_posts = await timer.run(
+                "ingest",
+                telegram_parser.parse_channels,
+                list(channels),
+                settings.hours_back,
+                posts_per_channel
+            ) or []
+        finally:
+            await telegram_parser.close()
+
+        service = ClusteringService()
+        texts = [post.post_text or "Пост без текста" for post in raw_posts]
+        embeddings = await timer.run("embed", service._get_embeddings, texts)
+        if embeddings is None:
+            # Без модели embeddings остальные этапы меряем на синтетических векторах той же формы
+            embeddings = make_embeddings(len(texts), dim=384)
+
+        await timer.run("find_optimal_clusters", service._find_optimal_clusters, embeddings)
+        clustered = await timer.run("cluster_embeddings", service._cluster_embeddings, embeddings)
+        labels = clustered[0] if clustered is not None else np.zeros(len(texts), dtype=int)
+        summary = await timer.run("representatives", summarize_clusters, labels, embeddings, 3)
+        if summary is not None:
+            await timer.run("naming", service._generate_cluster_names_with_llm, service._get_representative_posts(raw_posts, summary))
+        llm_requests = llm_server.requests
+        if service.llm_client is not None:
+            await service.llm_client.close()
+
+    return {
+        "posts": len(raw_posts),
+        "channels": len(channels),
+        "pages": sum(len(pages) for pages in channels.values()),
+        "clusters": int(len(set(labels.tolist()))),
+        "llm_requests": llm_requests,
+        "stages": timer.stages,
+        "errors": timer.errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--recorded", action="store_true", help="воспроизвести записанные страницы из benchmarks/fixtures")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-provider", choices=["openai", "ollama"], default="openai", help="API заглушки LLM")
+    parser.add_argument("--output", default=None, help="файл для JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    runs = []
+    if args.recorded:
+        channels = load_recorded()
+        recorded_posts = sum(len(extract_page(html, channel)["posts"]) for channel, pages in channels.items() for html in pages.values())
+        if not recorded_posts:
+            parser.error(f"в benchmarks/fixtures нет записанных постов - {RECORD_HINT}")
+        runs.append(("recorded", channels, 10 ** 6))
+    else:
+        for size in args.sizes:
+            n_channels = max(1, min(args.channels, size))
+            runs.append((size, generate_channels(size, n_channels), size // n_channels + 1))
+
+    results = []
+    for label, channels, posts_per_channel in runs:
+        result = asyncio.run(run_scale(channels, posts_per_channel, args.llm_latency, args.llm_provider))
+        result["scale"] = label
+        stages = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in result["stages"].items())
+        print(f"[{label}] {result['posts']} постов: {stages}", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "html_extractor": settings.html_extractor,
+            "embedding_model": settings.embedding_model,
+            "embedding_backend": settings.embedding_backend,
+            "clustering_backend": settings.clustering_backend,
+            "llm_provider": args.llm_provider,
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Локальный LLM сервер для бенчмарков: OpenAI-совместимый /v1/chat/completions и Ollama /api/chat с фиксированной задержкой."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import json
+import threading
+import time
+
+
+class StubLLMServer:
+    """Заглушка LLM: возвращает {"name": ...} через latency секунд; name - одно название на все ответы"""
+
+    def __init__(self, latency: float = 0.2, host: str = "127.0.0.1", port: int = 0, name: Optional[str] = None):
+        self.requests = 0
+        # Число одновременно обрабатываемых запросов и его максимум
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                    number = stub.requests
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(latency)
+                with stub._lock:
+                    stub.in_flight -= 1
+                content = json.dumps({"name": name or f"Тема {number}"}, ensure_ascii=False)
+                if self.path.startswith("/api/chat"):
+                    body = json.dumps({
+                        "model": payload.get("model", "stub"),
+                        "message": {"role": "assistant", "content": content},
+                        "done": True,
+                        "prompt_eval_count": 0,
+                        "eval_count": 0,
+                    }).encode("utf-8")
+                else:
+                    body = json.dumps({
+                        "id": f"stub-{number}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": payload.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def root_url(self) -> str:
+        """Адрес для Ollama клиента"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """Адрес для OpenAI-совместимого клиента"""
+        return f"{self.root_url}/v1"
+
+    def __enter__(self) -> "StubLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
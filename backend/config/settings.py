@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     
     # Model Configuration
     openai_model: str = "gpt-4.1-nano-2025-04-14"
+    openai_base_url: Optional[str] = None  # OpenAI-совместимый сервер (по умолчанию api.openai.com)
     anthropic_model: str = "claude-3-haiku-20240307"
     gemini_model: str = "gemini-pro"
     ollama_model: str = "llama2"
@@ -29,13 +30,93 @@ class Settings(BaseSettings):
     # Clustering Configuration
     max_concurrent_requests: int = 5
     clustering_timeout: int = 30
+    llm_json_retries: int = 1  # повторы запроса при некорректном JSON в ответе LLM
+    llm_naming_concurrency: int = 4
+    cluster_name_cache_ttl_seconds: int = 86400
+    cluster_name_cache_max_entries: int = 1000
     min_clusters: int = 2
     max_clusters: int = 8
     embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_warmup_on_startup: bool = True  # загрузка модели в фоне при старте, иначе - при первой кластеризации
+    embedding_backend: Literal["torch", "torch_int8", "onnx"] = "torch"
+    embedding_model_path: Optional[str] = None  # локальный каталог модели вместо загрузки по имени
+    embedding_onnx_file: Optional[str] = None  # например onnx/model_qint8_avx512_vnni.onnx
+    embedding_batch_size: int = 64
+    embedding_threads: int = 0  # 0 - по умолчанию библиотеки
+    cluster_selection_metric: Literal["silhouette", "calinski_harabasz"] = "silhouette"
+    silhouette_sample_size: int = 2000
+    clustering_n_jobs: int = -1
+    clustering_backend: Literal["auto", "kmeans", "minibatch", "hdbscan"] = "auto"
+    clustering_large_input_threshold: int = 5000  # auto: выше порога - clustering_large_backend
+    clustering_large_backend: Literal["minibatch", "hdbscan"] = "minibatch"
+    hdbscan_min_cluster_size: int = 10
+    hdbscan_pca_components: int = 32
+    clustering_workers: int = 1
+    clustering_queue_size: int = 4
+    
+    # Near-duplicate Detection
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.92
+    
+    # Incremental Clustering
+    clustering_mode: Literal["batch", "incremental"] = "batch"
+    incremental_distance_threshold: float = 0.5
+    incremental_drift_limit: float = 0.3
+    incremental_min_new_cluster_size: int = 3
+    
+    # Embedding Cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_dir: str = "cache/embeddings"
+    embedding_cache_max_items: int = 50000
+    embedding_cache_max_age_hours: int = 168
+    embedding_cache_flush_interval_seconds: float = 30.0  # индекс кэша пишется на диск не чаще
+    
+    # Similar Posts Index
+    vector_index_enabled: bool = True
+    vector_index_dir: str = "cache/vector_index"
+    vector_index_n_probe: int = 8
+    vector_index_min_train_size: int = 1024
+    vector_index_flush_interval_seconds: float = 30.0  # идентификаторы и IVF пишутся на диск не чаще
     
     # Telegram Parsing
     posts_limit_per_channel: int = 50
     hours_back: int = 24
+    max_pages_per_channel: int = 20
+    channel_timeout_seconds: float = 20.0  # время запросов канала без ожидания слота хоста
+    telegram_base_url: str = "https://t.me"
+    html_extractor: Literal["auto", "lxml", "bs4"] = "auto"
+    parse_executor: Literal["process", "thread", "inline"] = "process"
+    parse_workers: int = 0  # 0 - по числу ядер
+    http2_enabled: bool = True
+    http_timeout: float = 30.0
+    http_max_retries: int = 3
+    http_backoff_base: float = 0.5
+    
+    # Post Store
+    post_store_enabled: bool = True
+    post_store_path: str = "data/posts.db"
+    post_store_retention_days: int = 30
+    
+    # Background Snapshot
+    snapshot_enabled: bool = True
+    snapshot_refresh_interval_seconds: int = 300
+    
+    # Page Cache
+    page_cache_enabled: bool = True
+    page_cache_ttl_seconds: int = 60
+    page_cache_max_entries: int = 2000
+    
+    # Keyword Fallback (категории ключевых слов перечитываются при изменении файла)
+    keyword_clusters_file: str = "config/keyword_clusters.json"
+    keyword_clusters_reload_seconds: float = 5.0
+    
+    # Result Cache (/posts и /cluster)
+    result_cache_ttl_seconds: int = 30  # 0 - только объединение одновременных одинаковых запросов
+    result_cache_max_entries: int = 32
+    
+    # Metrics
+    metrics_enabled: bool = True  # Prometheus эндпоинт /metrics
+    server_timing_enabled: bool = True  # заголовок Server-Timing с длительностями этапов /posts
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -4,13 +4,18 @@ import os
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
 import logging
+import time
 import uvicorn
 
-from api.routes import router
+from api.routes import router, telegram_parser, snapshot_scheduler, post_store, clustering_services, vector_index
 from config.settings import settings
+from services.model_registry import embedding_models
+from services.metrics import REQUEST_SECONDS
 
 # Настройка логирования
 log_level = logging.DEBUG if os.getenv("DEBUG_DATES", "false").lower() == "true" else logging.INFO
@@ -42,9 +47,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_template(request: Request) -> str:
+    """Шаблон маршрута (без значений параметров пути) - ограничивает число серий метрики"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Время обработки запросов по шаблону маршрута (без значений параметров пути)"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    REQUEST_SECONDS.labels(request.method, _route_template(request), str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
 # Подключение роутов
 app.include_router(router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def startup():
+    """Фоновый прогрев embedding модели и запуск фонового обновления снапшота"""
+    if settings.embedding_warmup_on_startup:
+        app.state.warmup_task = asyncio.create_task(embedding_models.warm_up(settings.embedding_model))
+    if settings.snapshot_enabled:
+        snapshot_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Освобождение ресурсов при остановке сервера"""
+    await snapshot_scheduler.stop()
+    await telegram_parser.close()
+    await clustering_services.close()
+    embedding_models.flush()
+    if vector_index is not None:
+        vector_index.flush()
+    if post_store is not None:
+        post_store.close()
+
 @app.get("/")
 async def root():
     """Корневой эндпоинт"""
@@ -55,6 +93,12 @@ async def root():
         "health": "/api/v1/health"
     }
 
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Метрики в формате Prometheus"""
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     logger.info(f"Запуск сервера на {settings.api_host}:{settings.api_port}")
     logger.info(f"LLM провайдер: {settings.llm_provider}")
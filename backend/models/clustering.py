@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from models.post import Post, RawPost
+
+
+class ClusteredPost(Post):
+    """Пост после кластеризации вместе со свернутыми в него почти-дубликатами"""
+    duplicates: List[RawPost] = []
+
+
+class ClusterStats(BaseModel):
+    """Размер и плотность кластера"""
+    cluster_id: int
+    cluster_name: str
+    size: int
+    cohesion: float  # средняя косинусная близость постов к центроиду
+    spread: float  # среднеквадратичное расстояние постов до центроида
@@ -0,0 +1,7 @@
+from models.post import HealthResponse
+
+
+class ReadinessHealthResponse(HealthResponse):
+    """Ответ /health с состоянием загрузки embedding модели"""
+    embedding_model_status: str  # not_loaded, loading, ready, failed
+    ready: bool  # модель загружена - кластеризация не будет ждать ее загрузки
@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from models.post import RawPost
+
+
+class SimilarPost(RawPost):
+    """Пост из истории с косинусной близостью к запросу"""
+    score: float
+
+
+class SimilarPostsResponse(BaseModel):
+    """Ответ /similar"""
+    query_post_id: Optional[str] = None
+    query_text: Optional[str] = None
+    results: List[SimilarPost]
+    index_size: int
+    processing_time_seconds: float
@@ -0,0 +1,11 @@
+from typing import List, Optional
+
+from models.clustering import ClusteredPost, ClusterStats
+from models.post import PostsResponse
+
+
+class SnapshotPostsResponse(PostsResponse):
+    """Ответ /posts с возрастом снапшота, из которого он был построен"""
+    posts: List[ClusteredPost]
+    clusters: List[ClusterStats] = []
+    snapshot_age: Optional[float] = None  # секунды с момента построения снапшота, None - посчитано по запросу
@@ -0,0 +1,99 @@
+from typing import Dict, Tuple
+import logging
+import threading
+import numpy as np
+
+from services.clustering_backends import NOISE_LABEL
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Нормализация векторов для косинусного расстояния"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IncrementalClusterState:
+    """Состояние онлайн-кластеризации: центроиды и названия кластеров между запросами"""
+
+    def __init__(self, max_weight: int = 500):
+        # Ограничение веса центроида, чтобы он успевал следовать за сменой тем
+        self.max_weight = max_weight
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.weights = np.zeros(0, dtype=np.float64)
+        self.cluster_ids = np.zeros(0, dtype=np.int64)
+        self.names: Dict[int, str] = {}
+        self.next_id = 0
+        self._lock = threading.Lock()
+
+    def is_initialized(self) -> bool:
+        """Есть ли сохраненные кластеры"""
+        return len(self.cluster_ids) > 0
+
+    def reset(self, embeddings: np.ndarray, labels: np.ndarray, names: Dict[int, str]):
+        """Полная замена состояния по результатам обычной кластеризации"""
+        with self._lock:
+            self.centroids = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+            self.weights = np.zeros(0, dtype=np.float64)
+            self.cluster_ids = np.zeros(0, dtype=np.int64)
+            self.names = {}
+            self.next_id = 0
+        return self.add_clusters(embeddings, labels, names)
+
+    def add_clusters(self, embeddings: np.ndarray, labels: np.ndarray, names: Dict[int, str]) -> np.ndarray:
+        """Добавляет новые кластеры и возвращает их постоянные идентификаторы для каждого поста (шум остается NOISE_LABEL)"""
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+        stable_labels = np.full(len(labels), NOISE_LABEL, dtype=np.int64)
+
+        with self._lock:
+            new_centroids = []
+            new_weights = []
+            new_ids = []
+            # Шум не становится центроидом: в "Другое" посты попадают только по порогу расстояния
+            for local_id in np.unique(labels[labels != NOISE_LABEL]):
+                mask = labels == local_id
+                cluster_id = self.next_id
+                self.next_id += 1
+
+                new_centroids.append(_normalize(embeddings[mask].mean(axis=0)))
+                new_weights.append(min(int(mask.sum()), self.max_weight))
+                new_ids.append(cluster_id)
+                self.names[cluster_id] = names.get(int(local_id), f"Кластер {cluster_id + 1}")
+                stable_labels[mask] = cluster_id
+
+            if not new_ids:
+                return stable_labels
+            self.centroids = np.vstack([self.centroids, np.array(new_centroids, dtype=np.float32)])
+            self.weights = np.concatenate([self.weights, new_weights])
+            self.cluster_ids = np.concatenate([self.cluster_ids, new_ids])
+
+        return stable_labels
+
+    def assign(self, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Назначение постов ближайшему центроиду; возвращает метки и косинусные расстояния"""
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            similarities = embeddings @ self.centroids.T
+            nearest = np.argmax(similarities, axis=1)
+            distances = 1.0 - similarities[np.arange(len(embeddings)), nearest]
+            return self.cluster_ids[nearest], distances
+
+    def update(self, embeddings: np.ndarray, labels: np.ndarray):
+        """Сдвиг центроидов к новым постам (скользящее среднее)"""
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            positions = {cluster_id: i for i, cluster_id in enumerate(self.cluster_ids)}
+            for cluster_id in np.unique(labels[labels != NOISE_LABEL]):
+                pos = positions[int(cluster_id)]
+                mask = labels == cluster_id
+                count = int(mask.sum())
+                weight = self.weights[pos]
+                merged = (self.centroids[pos] * weight + embeddings[mask].sum(axis=0)) / (weight + count)
+                self.centroids[pos] = _normalize(merged)
+                self.weights[pos] = min(weight + count, self.max_weight)
+
+    def get_names(self) -> Dict[int, str]:
+        """Названия всех известных кластеров"""
+        with self._lock:
+            return dict(self.names)
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+from scipy import sparse
+
+
+@dataclass
+class ClusterSummary:
+    """Центроиды, статистика и репрезентативные посты всех кластеров"""
+    cluster_ids: np.ndarray
+    centroids: np.ndarray
+    sizes: np.ndarray
+    cohesion: np.ndarray  # средняя косинусная близость постов к центроиду
+    spread: np.ndarray  # среднеквадратичное расстояние постов до центроида
+    representatives: Dict[int, np.ndarray]  # кластер -> индексы ближайших к центроиду постов
+
+    def get_stats(self) -> Dict[int, dict]:
+        """Статистика по кластерам"""
+        return {
+            int(cluster_id): {
+                "size": int(self.sizes[i]),
+                "cohesion": float(self.cohesion[i]),
+                "spread": float(self.spread[i]),
+            }
+            for i, cluster_id in enumerate(self.cluster_ids)
+        }
+
+
+def summarize_clusters(labels: np.ndarray, embeddings: np.ndarray, top_m: int = 3,
+                       centers: Optional[np.ndarray] = None) -> ClusterSummary:
+    """Один векторизованный проход: групповые центроиды, расстояния до них и top-m постов каждого кластера.
+
+    centers - уже посчитанные центроиды (например, KMeans cluster_centers_), строка i соответствует метке i.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = len(embeddings)
+    cluster_ids, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    # Групповое среднее одним умножением разреженной матрицы принадлежности (k x n) на embeddings
+    membership = sparse.csr_matrix((np.ones(n, dtype=np.float32), (inverse, np.arange(n))), shape=(len(cluster_ids), n))
+    centroids = np.asarray(membership @ embeddings / sizes[:, None], dtype=np.float32)
+    if centers is not None:
+        reuse = (cluster_ids >= 0) & (cluster_ids < len(centers))
+        centroids[reuse] = centers[cluster_ids[reuse]]
+
+    # |e - c|^2 = |e|^2 + |c|^2 - 2 e·c - без промежуточной матрицы разностей
+    dots = np.einsum("ij,ij->i", embeddings, centroids[inverse])
+    embedding_norms = np.einsum("ij,ij->i", embeddings, embeddings)
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)[inverse]
+    distances = np.sqrt(np.maximum(embedding_norms + centroid_norms - 2 * dots, 0.0))
+    cosine = dots / np.maximum(np.sqrt(embedding_norms * centroid_norms), 1e-12)
+
+    cohesion = np.bincount(inverse, weights=cosine) / sizes
+    spread = np.sqrt(np.bincount(inverse, weights=distances ** 2) / sizes)
+
+    # Посты, отсортированные по кластеру: каждый кластер - непрерывный отрезок
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    representatives = {}
+    for group, cluster_id in enumerate(cluster_ids):
+        members = order[bounds[group]:bounds[group + 1]]
+        if len(members) > top_m:
+            members = members[np.argpartition(distances[members], top_m - 1)[:top_m]]
+        representatives[int(cluster_id)] = members[np.argsort(distances[members], kind="stable")]
+
+    return ClusterSummary(
+        cluster_ids=cluster_ids,
+        centroids=centroids,
+        sizes=sizes,
+        cohesion=cohesion,
+        spread=spread,
+        representatives=representatives
+    )
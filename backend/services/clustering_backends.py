@@ -0,0 +1,86 @@
+from typing import List, Optional
+import logging
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import PCA
+
+from services.model_selection import ModelSelectionResult, select_kmeans_model
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sklearn.cluster import HDBSCAN  # scikit-learn >= 1.3
+    HDBSCAN_AVAILABLE = True
+except ImportError:
+    HDBSCAN_AVAILABLE = False
+
+# Метка шумовых постов (HDBSCAN) - они попадают в кластер "Другое"
+NOISE_LABEL = -1
+
+
+def resolve_backend(name: str, n_samples: int, large_input_threshold: int, large_backend: str) -> str:
+    """Выбор алгоритма: в режиме auto большие выборки уходят на алгоритм без полного перебора k"""
+    if name == "auto":
+        name = large_backend if n_samples > large_input_threshold else "kmeans"
+    if name == "hdbscan" and not HDBSCAN_AVAILABLE:
+        logger.warning("⚠️ HDBSCAN недоступен (нужен scikit-learn >= 1.3), используем minibatch")
+        name = "minibatch"
+    return name
+
+
+def select_minibatch_model(embeddings: np.ndarray, candidate_ks: List[int], metric: str = "silhouette",
+                           sample_size: int = 2000, n_jobs: int = -1, random_state: int = 42,
+                           batch_size: int = 4096) -> Optional[ModelSelectionResult]:
+    """Подбор k на подвыборке и обучение MiniBatchKMeans на всех данных"""
+    sample = embeddings
+    if len(embeddings) > sample_size:
+        rng = np.random.RandomState(random_state)
+        sample = embeddings[rng.choice(len(embeddings), size=sample_size, replace=False)]
+
+    sample_selection = select_kmeans_model(
+        sample, candidate_ks, metric=metric, sample_size=sample_size,
+        n_jobs=n_jobs, random_state=random_state, n_init=3
+    )
+    if sample_selection is None:
+        return None
+
+    # Центроиды подвыборки - начальное приближение для всего набора
+    model = MiniBatchKMeans(
+        n_clusters=sample_selection.k,
+        init=sample_selection.centers,
+        n_init=1,
+        batch_size=batch_size,
+        random_state=random_state
+    )
+    labels = model.fit_predict(embeddings)
+    return ModelSelectionResult(
+        k=sample_selection.k,
+        labels=labels,
+        centers=model.cluster_centers_,
+        score=sample_selection.score,
+        metric=sample_selection.metric
+    )
+
+
+def fit_hdbscan(embeddings: np.ndarray, min_cluster_size: int = 10, min_samples: Optional[int] = None,
+                n_components: int = 32, n_jobs: int = -1, random_state: int = 42) -> Optional[ModelSelectionResult]:
+    """Плотностная кластеризация без перебора k; шумовые посты получают NOISE_LABEL"""
+    # Деревья соседей HDBSCAN плохо работают в высокой размерности - сжимаем embeddings через PCA
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    reduced = embeddings / np.maximum(norms, 1e-12)
+    if n_components and reduced.shape[1] > n_components and len(reduced) > n_components:
+        reduced = PCA(n_components=n_components, random_state=random_state).fit_transform(reduced)
+
+    model = HDBSCAN(
+        min_cluster_size=max(2, min(min_cluster_size, len(embeddings))),
+        min_samples=min_samples,
+        n_jobs=n_jobs,
+        copy=False
+    )
+    labels = model.fit_predict(reduced)
+    cluster_ids = [label for label in np.unique(labels) if label != NOISE_LABEL]
+    if not cluster_ids:
+        return None
+
+    centers = np.vstack([embeddings[labels == label].mean(axis=0) for label in cluster_ids])
+    return ModelSelectionResult(k=len(cluster_ids), labels=labels, centers=centers, score=float("nan"), metric="hdbscan")
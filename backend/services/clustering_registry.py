@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import threading
+
+from config.settings import settings
+from services.cluster_state import IncrementalClusterState
+from services.clustering_service import ClusteringJobs, ClusteringService
+from services.name_cache import ClusterNameCache
+from services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = ("openai", "anthropic", "gemini", "ollama", "none")
+
+
+class ClusteringServiceRegistry:
+    """Сервисы кластеризации по LLM провайдерам: один экземпляр на провайдер, общие модель, индекс, пул потоков, очередь, кэш названий и состояние"""
+
+    def __init__(self, vector_index: Optional[VectorIndex] = None):
+        self.vector_index = vector_index
+        self.default_provider = settings.llm_provider
+        # Лимит очереди действует на все провайдеры сразу - они делят один пул потоков
+        self.jobs = ClusteringJobs(settings.clustering_queue_size)
+        self.name_cache = ClusterNameCache(
+            ttl_seconds=settings.cluster_name_cache_ttl_seconds,
+            max_entries=settings.cluster_name_cache_max_entries
+        )
+        self.cluster_state = IncrementalClusterState()
+        self._state_lock = asyncio.Lock()
+        self.default = self._create(self.default_provider)
+        self._services: Dict[str, ClusteringService] = {self.default_provider: self.default}
+        self._lock = threading.Lock()
+
+    def get(self, provider: Optional[str] = None) -> ClusteringService:
+        """Сервис для провайдера (по умолчанию - из настроек); создается при первом обращении"""
+        provider = provider or self.default_provider
+        if provider not in LLM_PROVIDERS:
+            raise ValueError(f"Неизвестный LLM провайдер: {provider}")
+
+        service = self._services.get(provider)
+        if service is not None:
+            return service
+
+        with self._lock:
+            service = self._services.get(provider)
+            if service is None:
+                logger.info(f"🔌 Сервис кластеризации для провайдера {provider}")
+                service = self._create(provider, self.default.executor)
+                self._services[provider] = service
+            return service
+
+    def _create(self, provider: str, executor: Optional[ThreadPoolExecutor] = None) -> ClusteringService:
+        """Сервис провайдера на общих ресурсах реестра"""
+        return ClusteringService(
+            vector_index=self.vector_index,
+            llm_provider=provider,
+            executor=executor,
+            jobs=self.jobs,
+            name_cache=self.name_cache,
+            cluster_state=self.cluster_state,
+            state_lock=self._state_lock
+        )
+
+    async def close(self):
+        """Закрытие соединений клиентов LLM"""
+        for service in list(self._services.values()):
+            if service.llm_client is not None:
+                await service.llm_client.close()
+
+    def providers(self) -> List[str]:
+        """Провайдеры с уже созданными сервисами"""
+        return list(self._services)
@@ -1,217 +1,384 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 import asyncio
 import logging
 import random
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import numpy as np
-from sklearn.cluster import DBSCAN, KMeans
-from sklearn.metrics import silhouette_score
-from sentence_transformers import SentenceTransformer
-import openai
 
-from models.post import RawPost, Post
+from models.post import RawPost
+from models.clustering import ClusteredPost, ClusterStats
 from config.settings import settings
+from services.model_selection import ModelSelectionResult, select_kmeans_model
+from services.cluster_state import IncrementalClusterState
+from services.deduplication import find_near_duplicates
+from services.clustering_backends import NOISE_LABEL, fit_hdbscan, resolve_backend, select_minibatch_model
+from services.vector_index import VectorIndex
+from services.model_registry import embedding_models
+from services.metrics import CLUSTERING_STAGE_SECONDS, KSWEEP_SECONDS
+from services.llm_clients import LLMResponseError, create_llm_client
+from services.name_cache import ClusterNameCache
+from services.keyword_matcher import keyword_matcher
+from services.cluster_summary import ClusterSummary, summarize_clusters
 
 logger = logging.getLogger(__name__)
 
+# Название кластера для шумовых постов плотностной кластеризации
+OTHER_CLUSTER_NAME = "Другое"
+
+
+def deduplicate_names(names: Dict[int, str], taken: Iterable[str] = ()) -> Dict[int, str]:
+    """Уникальные названия кластеров: повторное название получает номер ("Тема (2)")"""
+    used = set(taken)
+    unique = {}
+    for cluster_id in sorted(names):
+        name = candidate = names[cluster_id]
+        suffix = 2
+        while candidate in used:
+            candidate = f"{name} ({suffix})"
+            suffix += 1
+        used.add(candidate)
+        unique[cluster_id] = candidate
+    return unique
+
+class ClusteringBusyError(Exception):
+    """Очередь кластеризации переполнена"""
+    pass
+
+class ClusteringJobs:
+    """Счетчик выполняющихся задач кластеризации с ограничением очереди (общий для сервисов на одном пуле)"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+
+    def acquire(self):
+        """Место в очереди или ClusteringBusyError"""
+        if self.pending >= self.max_pending:
+            logger.warning(f"⚠️ Очередь кластеризации заполнена ({self.pending}/{self.max_pending})")
+            raise ClusteringBusyError("Сервис кластеризации перегружен, повторите запрос позже")
+        self.pending += 1
+
+    def release(self):
+        self.pending -= 1
+
 class ClusteringService:
-    def __init__(self):
-        self.embedding_model = None
-        self.openai_client = None
-        
-        # Простые категории для keyword-based кластеризации (fallback)
-        self.keyword_clusters = {
-            "Искусственный интеллект": ["ai", "ии", "нейро", "ml", "машинное обучение", "gpt", "llm", "openai", "anthropic", "claude"],
-            "Вакансии": ["работа", "вакансия", "hiring", "job", "developer", "разработчик"],
-            "Новости": ["новости", "news", "обновление", "релиз", "анонс"],
-            "Мемы": ["мем", "😂", "🤣", "funny", "юмор", "прикол"],
-            "Криптовалюты": ["крипто", "bitcoin", "блокчейн", "ethereum", "btc", "eth"],
-            "Разработка": ["код", "программ", "разработ", "python", "javascript", "github"],
-            "Бизнес": ["стартап", "бизнес", "инвест", "деньги", "финансы"],
-            "Образование": ["курс", "обучение", "туториал", "урок", "лекция"],
-            "События": ["конференция", "митап", "событие", "встреча", "мероприятие"]
-        }
+    def __init__(self, vector_index: Optional[VectorIndex] = None, llm_provider: Optional[str] = None,
+                 executor: Optional[ThreadPoolExecutor] = None, jobs: Optional[ClusteringJobs] = None,
+                 name_cache: Optional[ClusterNameCache] = None, cluster_state: Optional[IncrementalClusterState] = None,
+                 state_lock: Optional[asyncio.Lock] = None):
+        # Модель загружается лениво через общий реестр и переиспользуется всеми экземплярами сервиса
+        self.embedding_model_name = settings.embedding_model
+        # Индекс похожих постов пополняется embeddings, посчитанными при кластеризации
+        self.vector_index = vector_index
+        # Провайдер задается при создании и не меняется - запросы с другим провайдером получают свой экземпляр
+        self.llm_provider = llm_provider or settings.llm_provider
+        self.llm_client = None
+        
+        # Кэш названий кластеров между обновлениями (может быть общим для провайдеров)
+        self.name_cache = name_cache or ClusterNameCache(
+            ttl_seconds=settings.cluster_name_cache_ttl_seconds,
+            max_entries=settings.cluster_name_cache_max_entries
+        )
+        
+        # Отдельный пул для CPU-нагруженных этапов, чтобы не блокировать event loop (может быть общим для провайдеров);
+        # очередь ограничивается на весь пул, а не на каждый сервис
+        self.executor = executor or ThreadPoolExecutor(max_workers=settings.clustering_workers, thread_name_prefix="clustering")
+        self.jobs = jobs or ClusteringJobs(settings.clustering_queue_size)
+        
+        # Состояние онлайн-кластеризации (clustering_mode = "incremental")
+        self.cluster_state = cluster_state or IncrementalClusterState()
+        self._state_lock = state_lock or asyncio.Lock()
         
         self._initialize_models()
 
+    @property
+    def embedding_cache(self):
+        """Кэш embeddings модели (появляется после ее загрузки)"""
+        return embedding_models.get_cache(self.embedding_model_name)
+
     def _initialize_models(self):
         """Инициализация моделей"""
         try:
-            # Инициализация embedding модели
-            logger.info("🔄 Загружаем модель для embeddings...")
-            self.embedding_model = SentenceTransformer(settings.embedding_model)
-            logger.info("✅ Embedding модель загружена")
-            
-            # Инициализация OpenAI клиента
-            if settings.openai_api_key:
-                self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-                logger.info("✅ OpenAI клиент инициализирован")
-            else:
-                logger.warning("⚠️ OpenAI API ключ не найден, будет использоваться fallback")
+            # Инициализация клиента LLM выбранного провайдера
+            self.llm_client = create_llm_client(self.llm_provider)
+            if self.llm_client is not None:
+                logger.info(f"✅ LLM клиент инициализирован: {self.llm_provider} ({self.llm_client.model})")
+            elif self.llm_provider != "none":
+                logger.warning(f"⚠️ API ключ для {self.llm_provider} не найден, будет использоваться fallback")
                 
         except Exception as e:
             logger.error(f"❌ Ошибка инициализации моделей: {e}")
 
     def _get_embeddings(self, texts: List[str]) -> np.ndarray:
         """Получение embeddings для текстов"""
-        if not self.embedding_model:
-            raise Exception("Embedding модель не инициализирована")
+        # При первом вызове модель загружается (в потоке пула, а не в event loop)
+        embedding_model = embedding_models.get(self.embedding_model_name)
         
         # Фильтруем пустые тексты
         valid_texts = [text if text else "Пост без текста" for text in texts]
         
         logger.info(f"🔄 Получаем embeddings для {len(valid_texts)} текстов...")
-        embeddings = self.embedding_model.encode(valid_texts)
+        if self.embedding_cache is not None:
+            embeddings = self.embedding_cache.encode(valid_texts, embedding_model.encode)
+        else:
+            embeddings = embedding_model.encode(valid_texts)
         logger.info(f"✅ Embeddings получены: {embeddings.shape}")
         
         return embeddings
 
-    def _find_optimal_clusters(self, embeddings: np.ndarray, min_clusters: int = None, max_clusters: int = None) -> int:
-        """Определение оптимального количества кластеров"""
+    async def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Embeddings для произвольных текстов (в пуле кластеризации)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get_embeddings, texts)
+
+    def _find_optimal_clusters(self, embeddings: np.ndarray, min_clusters: int = None, max_clusters: int = None,
+                               backend: str = "kmeans") -> Optional[ModelSelectionResult]:
+        """Определение оптимального количества кластеров (с переиспользованием обученных моделей)"""
         if min_clusters is None:
             min_clusters = settings.min_clusters
         if max_clusters is None:
             max_clusters = settings.max_clusters
             
         if len(embeddings) < min_clusters:
-            return 1
+            return None
         
-        best_score = -1
-        best_k = min_clusters
+        candidate_ks = list(range(min_clusters, min(max_clusters + 1, len(embeddings))))
+        if not candidate_ks:
+            # Постов ровно min_clusters - перебирать нечего
+            candidate_ks = [min_clusters]
         
-        for k in range(min_clusters, min(max_clusters + 1, len(embeddings))):
-            try:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-                cluster_labels = kmeans.fit_predict(embeddings)
-                
-                if len(set(cluster_labels)) > 1:  # Больше одного кластера
-                    score = silhouette_score(embeddings, cluster_labels)
-                    if score > best_score:
-                        best_score = score
-                        best_k = k
-            except Exception as e:
-                logger.warning(f"Ошибка при k={k}: {e}")
-                continue
-        
-        logger.info(f"🎯 Оптимальное количество кластеров: {best_k} (score: {best_score:.3f})")
-        return best_k
-
-    def _cluster_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
-        """Кластеризация embeddings"""
+        select_model = select_minibatch_model if backend == "minibatch" else select_kmeans_model
+        with KSWEEP_SECONDS.labels(backend).time():
+            selection = select_model(
+                embeddings,
+                candidate_ks,
+                metric=settings.cluster_selection_metric,
+                sample_size=settings.silhouette_sample_size,
+                n_jobs=settings.clustering_n_jobs
+            )
+        
+        if selection is None:
+            logger.warning("⚠️ Не удалось обучить KMeans, используем один кластер")
+            return None
+        
+        logger.info(f"🎯 Оптимальное количество кластеров: {selection.k} ({selection.metric}: {selection.score:.3f})")
+        return selection
+
+    def _cluster_embeddings(self, embeddings: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Кластеризация embeddings; возвращает метки и центроиды (если алгоритм их посчитал)"""
         if len(embeddings) < 2:
-            return np.array([0] * len(embeddings))
+            return np.array([0] * len(embeddings)), None
         
-        # Определяем оптимальное количество кластеров
-        optimal_k = self._find_optimal_clusters(embeddings)
+        backend = resolve_backend(
+            settings.clustering_backend,
+            len(embeddings),
+            settings.clustering_large_input_threshold,
+            settings.clustering_large_backend
+        )
         
-        # Выполняем кластеризацию
-        if optimal_k == 1:
-            return np.array([0] * len(embeddings))
+        if backend == "hdbscan":
+            # Плотностная кластеризация сама определяет число кластеров, шум помечается NOISE_LABEL
+            selection = fit_hdbscan(
+                embeddings,
+                min_cluster_size=settings.hdbscan_min_cluster_size,
+                n_components=settings.hdbscan_pca_components,
+                n_jobs=settings.clustering_n_jobs
+            )
+        else:
+            # Подбор k уже обучил все модели - берем метки лучшей
+            selection = self._find_optimal_clusters(embeddings, backend=backend)
         
-        kmeans = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(embeddings)
+        if selection is None:
+            return np.array([0] * len(embeddings)), None
         
-        logger.info(f"✅ Кластеризация завершена: {optimal_k} кластеров")
-        return cluster_labels
+        noise = int((selection.labels == NOISE_LABEL).sum())
+        logger.info(f"✅ Кластеризация завершена ({backend}): {selection.k} кластеров" + (f", шум: {noise} постов" if noise else ""))
+        return selection.labels, selection.centers
+
+    def _get_representative_posts(self, posts: List[RawPost], summary: ClusterSummary) -> Dict[int, List[str]]:
+        """Тексты репрезентативных постов для каждого кластера"""
+        # Шумовые посты не образуют темы - им название не генерируем
+        return {
+            cluster_id: [posts[i].post_text or "Пост без текста" for i in indices]
+            for cluster_id, indices in summary.representatives.items()
+            if cluster_id != NOISE_LABEL
+        }
+
+    async def _name_single_cluster(self, cluster_id: int, representatives: List[str], semaphore: asyncio.Semaphore) -> Optional[str]:
+        """Название одного кластера от LLM; None - если получить его не удалось"""
+        prompt = "Проанализируй группу постов из Telegram каналов про AI/технологии и дай ей короткое название (2-4 слова).\n\nПосты:\n"
+        for i, post in enumerate(representatives, 1):
+            prompt += f"{i}. {post[:200]}...\n"
+        prompt += """
+Ответь в формате JSON:
+{"name": "Название группы"}
 
-    def _get_representative_posts(self, posts: List[RawPost], cluster_labels: np.ndarray, embeddings: np.ndarray) -> Dict[int, List[str]]:
-        """Получение репрезентативных постов для каждого кластера"""
-        cluster_representatives = {}
+Название должно быть на русском языке, коротким и отражать основную тему группы."""
         
-        for cluster_id in set(cluster_labels):
-            cluster_mask = cluster_labels == cluster_id
-            cluster_posts = [posts[i] for i in range(len(posts)) if cluster_mask[i]]
-            cluster_embeddings = embeddings[cluster_mask]
-            
-            # Берем до 3 самых репрезентативных постов
-            if len(cluster_posts) <= 3:
-                representatives = [post.post_text or "Пост без текста" for post in cluster_posts]
-            else:
-                # Находим центроид кластера
-                centroid = np.mean(cluster_embeddings, axis=0)
-                
-                # Находим посты ближайшие к центроиду
-                distances = np.linalg.norm(cluster_embeddings - centroid, axis=1)
-                closest_indices = np.argsort(distances)[:3]
-                
-                representatives = [cluster_posts[i].post_text or "Пост без текста" for i in closest_indices]
-            
-            cluster_representatives[cluster_id] = representatives
+        try:
+            async with semaphore:
+                result = await self.llm_client.complete_json(prompt, max_tokens=60, retries=settings.llm_json_retries)
+        except LLMResponseError as e:
+            logger.error(f"❌ Не удалось распарсить JSON от LLM для кластера {cluster_id + 1}: {e}")
+            return None
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Таймаут LLM при генерации названия кластера {cluster_id + 1}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Ошибка при генерации названия кластера {cluster_id + 1}: {e}")
+            return None
         
-        return cluster_representatives
+        name = result.get("name")
+        return name.strip() if isinstance(name, str) and name.strip() else None
 
     async def _generate_cluster_names_with_llm(self, cluster_representatives: Dict[int, List[str]]) -> Dict[int, str]:
-        """Генерация названий кластеров с помощью LLM"""
-        if not self.openai_client:
-            logger.warning("⚠️ OpenAI недоступен, используем fallback названия")
-            return {cluster_id: f"Кластер {cluster_id + 1}" for cluster_id in cluster_representatives.keys()}
+        """Генерация названий кластеров с помощью LLM (параллельно по кластерам, с кэшем)"""
+        cluster_names = {cluster_id: f"Кластер {cluster_id + 1}" for cluster_id in cluster_representatives.keys()}
+        if not self.llm_client:
+            logger.warning("⚠️ LLM недоступен, используем fallback названия")
+            return cluster_names
+        
+        # Кластеры с теми же репрезентативными постами, что и в прошлый раз, берем из кэша
+        signatures = {}
+        for cluster_id, representatives in cluster_representatives.items():
+            signature = ClusterNameCache.make_signature(representatives)
+            cached_name = self.name_cache.get(signature)
+            if cached_name is not None:
+                cluster_names[cluster_id] = cached_name
+            else:
+                signatures[cluster_id] = signature
+        
+        if not signatures:
+            logger.info("💾 Все названия кластеров взяты из кэша")
+            return cluster_names
+        
+        logger.info(f"🤖 Запрашиваем у LLM названия {len(signatures)} кластеров ({len(cluster_representatives) - len(signatures)} из кэша)...")
+        semaphore = asyncio.Semaphore(settings.llm_naming_concurrency)
+        tasks = {
+            cluster_id: asyncio.create_task(self._name_single_cluster(cluster_id, cluster_representatives[cluster_id], semaphore))
+            for cluster_id in signatures
+        }
+        # Общий срок на именование: незавершенные запросы отменяются, их кластеры получают fallback названия
+        done, pending = await asyncio.wait(tasks.values(), timeout=settings.clustering_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} названий не получено за {settings.clustering_timeout} с")
         
+        # Ошибка в одном ответе не влияет на остальные кластеры
+        for cluster_id, task in tasks.items():
+            name = task.result() if task in done else None
+            if name is not None:
+                cluster_names[cluster_id] = name
+                self.name_cache.put(signatures[cluster_id], name)
+        
+        logger.info(f"✅ LLM сгенерировал названия: {cluster_names}")
+        return cluster_names
+
+    async def _run_stage(self, stage: str, timings: Dict[str, float], func, *args):
+        """Выполнение CPU-нагруженного этапа в пуле кластеризации с замером времени"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
         try:
-            # Формируем промпт для всех кластеров сразу
-            prompt = """Проанализируй группы постов из Telegram каналов про AI/технологии и дай каждой группе короткое название (2-4 слова).
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+            CLUSTERING_STAGE_SECONDS.labels(stage).observe(elapsed)
 
-Группы постов:
-"""
-            
-            for cluster_id, posts in cluster_representatives.items():
-                prompt += f"\nГруппа {cluster_id + 1}:\n"
-                for i, post in enumerate(posts, 1):
-                    prompt += f"{i}. {post[:200]}...\n"
-            
-            prompt += """
-Ответь в формате JSON:
-{
-  "0": "Название для группы 1",
-  "1": "Название для группы 2",
-  ...
-}
+    async def _name_clusters(self, cluster_representatives: Dict[int, List[str]], timings: Dict[str, float],
+                             taken: Iterable[str] = ()) -> Dict[int, str]:
+        """Генерация названий с замером времени этапа; названия не повторяют друг друга и уже занятые taken"""
+        started = time.perf_counter()
+        try:
+            names = await self._generate_cluster_names_with_llm(cluster_representatives) if cluster_representatives else {}
+            names = deduplicate_names(names, [OTHER_CLUSTER_NAME, *taken])
+            names[NOISE_LABEL] = OTHER_CLUSTER_NAME
+            return names
+        finally:
+            elapsed = time.perf_counter() - started
+            timings["naming"] = timings.get("naming", 0.0) + elapsed
+            CLUSTERING_STAGE_SECONDS.labels("naming").observe(elapsed)
+
+    async def _name_new_clusters(self, posts: List[RawPost], labels: np.ndarray, embeddings: np.ndarray, timings: Dict[str, float],
+                                 centers: Optional[np.ndarray] = None, taken: Iterable[str] = ()) -> Dict[int, str]:
+        """Названия для новых кластеров (метки должны идти с нуля)"""
+        summary = await self._run_stage("representatives", timings, summarize_clusters, labels, embeddings, 3, centers)
+        return await self._name_clusters(self._get_representative_posts(posts, summary), timings, taken)
+
+    async def _refit_cluster_state(self, posts: List[RawPost], embeddings: np.ndarray, timings: Dict[str, float]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """Полная перекластеризация с сохранением результата в состоянии"""
+        labels, centers = await self._run_stage("clustering", timings, self._cluster_embeddings, embeddings)
+        names = await self._name_new_clusters(posts, labels, embeddings, timings, centers)
+        stable_labels = self.cluster_state.reset(embeddings, labels, names)
+        return stable_labels, self._state_names()
 
-Названия должны быть на русском языке, короткие и отражать основную тему группы."""
+    def _state_names(self) -> Dict[int, str]:
+        """Названия кластеров состояния вместе с названием для шума"""
+        return {**self.cluster_state.get_names(), NOISE_LABEL: OTHER_CLUSTER_NAME}
 
-            logger.info("🤖 Запрашиваем названия кластеров у LLM...")
+    async def _cluster_incrementally(self, posts: List[RawPost], embeddings: np.ndarray, timings: Dict[str, float]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """Онлайн-кластеризация: назначение постов ближайшим сохраненным центроидам"""
+        async with self._state_lock:
+            state = self.cluster_state
             
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=500
-            )
+            if not state.is_initialized():
+                logger.info("🆕 Состояние кластеров пустое, выполняем полную кластеризацию")
+                return await self._refit_cluster_state(posts, embeddings, timings)
             
-            result_text = response.choices[0].message.content.strip()
+            labels, distances = await self._run_stage("assignment", timings, state.assign, embeddings)
+            outliers = distances > settings.incremental_distance_threshold
+            drift = float(outliers.mean())
+            logger.info(f"📐 Онлайн-кластеризация: {int(outliers.sum())} постов вне порога, дрейф {drift:.2f}")
             
-            # Парсим JSON ответ
-            try:
-                cluster_names = json.loads(result_text)
-                # Конвертируем ключи в int
-                cluster_names = {int(k): v for k, v in cluster_names.items()}
-                logger.info(f"✅ LLM сгенерировал названия: {cluster_names}")
-                return cluster_names
-            except json.JSONDecodeError:
-                logger.error(f"❌ Не удалось распарсить JSON от LLM: {result_text}")
-                return {cluster_id: f"Кластер {cluster_id + 1}" for cluster_id in cluster_representatives.keys()}
-                
-        except Exception as e:
-            logger.error(f"❌ Ошибка при генерации названий кластеров: {e}")
-            return {cluster_id: f"Кластер {cluster_id + 1}" for cluster_id in cluster_representatives.keys()}
+            too_many_clusters = len(state.cluster_ids) > settings.max_clusters * 2
+            if drift > settings.incremental_drift_limit or too_many_clusters:
+                logger.info("🔄 Дрейф превысил лимит, выполняем полную перекластеризацию")
+                return await self._refit_cluster_state(posts, embeddings, timings)
+            
+            # Центроиды существующих кластеров сдвигаем только постами, попавшими в порог
+            state.update(embeddings[~outliers], labels[~outliers])
+            
+            # Посты вне порога уходят в "Другое", если из них не выделится новый кластер
+            outlier_idx = np.where(outliers)[0]
+            labels[outlier_idx] = NOISE_LABEL
+            
+            # Достаточно постов вне существующих кластеров - выделяем из них новые
+            if len(outlier_idx) >= settings.incremental_min_new_cluster_size:
+                outlier_posts = [posts[i] for i in outlier_idx]
+                outlier_embeddings = embeddings[outlier_idx]
+                local_labels, local_centers = await self._run_stage("clustering", timings, self._cluster_embeddings, outlier_embeddings)
+                names = await self._name_new_clusters(
+                    outlier_posts, local_labels, outlier_embeddings, timings, local_centers, state.get_names().values()
+                )
+                labels[outlier_idx] = state.add_clusters(outlier_embeddings, local_labels, names)
+                logger.info(f"➕ Добавлено новых кластеров: {len(set(local_labels) - {NOISE_LABEL})}")
+            
+            return labels, self._state_names()
 
     def _classify_post_by_keywords(self, post_text: Optional[str]) -> str:
-        """Простая кластеризация по ключевым словам (fallback)"""
-        if not post_text:
-            return "Нет текста"
-        
-        text_lower = post_text.lower()
+        """Кластеризация по ключевым словам (fallback): категория с наибольшим числом совпадений"""
+        return keyword_matcher.get().classify(post_text)
+
+    async def cluster_posts(self, raw_posts: List[RawPost], timings: Optional[Dict[str, float]] = None,
+                            cluster_stats: Optional[List[ClusterStats]] = None, index_posts: bool = True) -> List[ClusteredPost]:
+        """Гибридная кластеризация постов с ограничением очереди; timings - время этапов, cluster_stats - статистика кластеров, index_posts - пополнять индекс похожих постов"""
+        self.jobs.acquire()
         
-        # Ищем совпадения с ключевыми словами
-        for cluster_name, keywords in self.keyword_clusters.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return cluster_name
+        if timings is None:
+            timings = {}
         
-        return "Некатегоризованные"
+        try:
+            return await self._cluster_posts(raw_posts, timings, cluster_stats if cluster_stats is not None else [], index_posts)
+        finally:
+            self.jobs.release()
+            if timings:
+                logger.info("⏱️ Этапы кластеризации: " + ", ".join(f"{stage}={seconds:.2f}с" for stage, seconds in timings.items()))
 
-    async def cluster_posts(self, raw_posts: List[RawPost]) -> List[Post]:
+    async def _cluster_posts(self, raw_posts: List[RawPost], timings: Dict[str, float], cluster_stats: List[ClusterStats],
+                             index_posts: bool = True) -> List[ClusteredPost]:
         """Гибридная кластеризация постов"""
         logger.info(f"🚀 Начинаем гибридную кластеризацию {len(raw_posts)} постов...")
         start_time = datetime.now()
@@ -240,37 +407,64 @@ class ClusteringService:
         raw_posts = filtered_posts  # Используем отфильтрованные посты
         
         # Если постов мало или нет embedding модели, используем keyword-based
-        if len(raw_posts) < 3 or not self.embedding_model:
+        if len(raw_posts) < 3 or not embedding_models.is_available(self.embedding_model_name):
             logger.info("🔄 Используем keyword-based кластеризацию (мало постов или нет модели)")
             clustered_posts = []
             for post in raw_posts:
                 cluster_name = self._classify_post_by_keywords(post.post_text)
-                clustered_post = Post(**post.dict(), cluster_name=cluster_name)
+                clustered_post = ClusteredPost(**post.dict(), cluster_name=cluster_name)
                 clustered_posts.append(clustered_post)
             return clustered_posts
         
+        # Канонический пост -> свернутые в него почти-дубликаты
+        duplicates_by_id: Dict[str, List[RawPost]] = {}
+        
         try:
             # 1. Получаем embeddings
             texts = [post.post_text or "Пост без текста" for post in raw_posts]
-            embeddings = self._get_embeddings(texts)
+            embeddings = await self._run_stage("embeddings", timings, self._get_embeddings, texts)
             
-            # 2. Кластеризуем
-            cluster_labels = self._cluster_embeddings(embeddings)
+            if self.vector_index is not None and index_posts:
+                await self._run_stage("indexing", timings, self.vector_index.add, [post.id for post in raw_posts], embeddings)
             
-            # 3. Получаем репрезентативные посты
-            cluster_representatives = self._get_representative_posts(raw_posts, cluster_labels, embeddings)
+            # 1.1 Сворачиваем почти-дубликаты (репосты) - кластеризуются только канонические посты
+            if settings.dedup_enabled:
+                timestamps = [datetime.fromisoformat(post.publication_datetime).timestamp() for post in raw_posts]
+                groups = await self._run_stage("dedup", timings, find_near_duplicates, embeddings, timestamps, settings.dedup_similarity_threshold)
+                canonical_idx = sorted(groups)
+                duplicates_by_id = {raw_posts[i].id: [raw_posts[j] for j in groups[i]] for i in canonical_idx if groups[i]}
+                if len(canonical_idx) < len(raw_posts):
+                    logger.info(f"🧬 Свернуто почти-дубликатов: {len(raw_posts) - len(canonical_idx)}, осталось {len(canonical_idx)} постов")
+                raw_posts = [raw_posts[i] for i in canonical_idx]
+                embeddings = embeddings[canonical_idx]
             
-            # 4. Генерируем названия кластеров с помощью LLM
-            cluster_names = await self._generate_cluster_names_with_llm(cluster_representatives)
+            if settings.clustering_mode == "incremental":
+                # 2-4. Назначаем посты существующим кластерам, новые кластеры создаем только при необходимости
+                cluster_labels, cluster_names = await self._cluster_incrementally(raw_posts, embeddings, timings)
+                summary = await self._run_stage("representatives", timings, summarize_clusters, cluster_labels, embeddings)
+            else:
+                # 2. Кластеризуем
+                cluster_labels, centers = await self._run_stage("clustering", timings, self._cluster_embeddings, embeddings)
+                
+                # 3. Получаем репрезентативные посты и статистику кластеров за один проход
+                summary = await self._run_stage("representatives", timings, summarize_clusters, cluster_labels, embeddings, 3, centers)
+                
+                # 4. Генерируем названия кластеров с помощью LLM
+                cluster_names = await self._name_clusters(self._get_representative_posts(raw_posts, summary), timings)
             
             # 5. Присваиваем названия кластеров постам
             clustered_posts = []
             for i, post in enumerate(raw_posts):
                 cluster_id = cluster_labels[i]
                 cluster_name = cluster_names.get(cluster_id, f"Кластер {cluster_id + 1}")
-                clustered_post = Post(**post.dict(), cluster_name=cluster_name)
+                clustered_post = ClusteredPost(**post.dict(), cluster_name=cluster_name, duplicates=duplicates_by_id.get(post.id, []))
                 clustered_posts.append(clustered_post)
             
+            cluster_stats.extend(
+                ClusterStats(cluster_id=cluster_id, cluster_name=cluster_names.get(cluster_id, f"Кластер {cluster_id + 1}"), **stats)
+                for cluster_id, stats in summary.get_stats().items()
+            )
+            
             processing_time = (datetime.now() - start_time).total_seconds()
             logger.info(f"✅ Гибридная кластеризация завершена за {processing_time:.2f} секунд")
             logger.info(f"📊 Создано кластеров: {len(set(cluster_labels))}")
@@ -285,7 +479,7 @@ class ClusteringService:
             clustered_posts = []
             for post in raw_posts:
                 cluster_name = self._classify_post_by_keywords(post.post_text)
-                clustered_post = Post(**post.dict(), cluster_name=cluster_name)
+                clustered_post = ClusteredPost(**post.dict(), cluster_name=cluster_name, duplicates=duplicates_by_id.get(post.id, []))
                 clustered_posts.append(clustered_post)
             
             return clustered_posts
@@ -296,10 +490,10 @@ class ClusteringService:
 
     def get_provider_info(self) -> dict:
         """Информация о текущем провайдере"""
-        has_embeddings = self.embedding_model is not None
-        has_openai = self.openai_client is not None
+        has_embeddings = embedding_models.is_available(self.embedding_model_name)
+        has_llm = self.llm_client is not None
         
-        if has_embeddings and has_openai:
+        if has_embeddings and has_llm:
             provider = "hybrid (embeddings + LLM)"
         elif has_embeddings:
             provider = "embeddings only"
@@ -308,7 +502,12 @@ class ClusteringService:
         
         return {
             "provider": provider,
+            "llm_provider": self.llm_provider,
             "available": True,
-            "embedding_model": "all-MiniLM-L6-v2" if has_embeddings else None,
-            "llm_model": settings.openai_model if has_openai else None
+            "embedding_model": self.embedding_model_name if has_embeddings else None,
+            "embedding_model_status": embedding_models.status(self.embedding_model_name),
+            "llm_model": self.llm_client.model if has_llm else None,
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else None,
+            "vector_index": self.vector_index.get_stats() if self.vector_index else None,
+            "cluster_name_cache": self.name_cache.get_stats()
         } 
\ No newline at end of file
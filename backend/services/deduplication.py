@@ -0,0 +1,47 @@
+from typing import Dict, List
+import numpy as np
+
+
+def _find_root(parents: np.ndarray, i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def find_near_duplicates(embeddings: np.ndarray, timestamps: List[float], threshold: float = 0.92,
+                         chunk_size: int = 1024) -> Dict[int, List[int]]:
+    """Группы почти-дубликатов по косинусной близости embeddings.
+
+    Возвращает словарь: индекс канонического (самого раннего) поста -> индексы его дубликатов.
+    Посты без дубликатов тоже присутствуют в словаре с пустым списком.
+    """
+    n = len(embeddings)
+    if n == 0:
+        return {}
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    # Объединяем пары выше порога (union-find); матрица сходства считается блоками
+    parents = np.arange(n)
+    for start in range(0, n, chunk_size):
+        block = normalized[start:start + chunk_size] @ normalized.T
+        rows, cols = np.nonzero(block >= threshold)
+        for row, col in zip(rows + start, cols):
+            if col <= row:
+                continue
+            root_a, root_b = _find_root(parents, row), _find_root(parents, col)
+            if root_a != root_b:
+                parents[root_b] = root_a
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(_find_root(parents, i), []).append(i)
+
+    # Каноническим считается самый ранний пост группы - это обычно первоисточник
+    result: Dict[int, List[int]] = {}
+    for members in groups.values():
+        canonical = min(members, key=lambda i: (timestamps[i], i))
+        result[canonical] = [i for i in members if i != canonical]
+    return result
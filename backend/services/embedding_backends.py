@@ -0,0 +1,95 @@
+from typing import TYPE_CHECKING, List, Optional
+import logging
+import time
+import numpy as np
+
+from services.metrics import EMBEDDED_TEXTS, EMBEDDING_BATCH_SECONDS, EMBEDDING_THROUGHPUT
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "torch_int8", "onnx")
+
+
+class EmbeddingEncoder:
+    """Обертка над моделью embeddings: батчи фиксированного размера из текстов близкой длины"""
+
+    def __init__(self, model: "SentenceTransformer", backend: str, batch_size: int = 64):
+        self.model = model
+        self.backend = backend
+        self.batch_size = batch_size
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings в исходном порядке текстов"""
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension() or 0
+            return np.zeros((0, dim), dtype=np.float32)
+
+        # Сортировка по длине - в батч попадают тексты близкой длины и паддинг минимален
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        result = None
+        for start in range(0, len(texts), self.batch_size):
+            batch_idx = order[start:start + self.batch_size]
+            started = time.perf_counter()
+            vectors = self.model.encode(
+                [texts[i] for i in batch_idx],
+                batch_size=len(batch_idx),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            elapsed = time.perf_counter() - started
+            EMBEDDING_BATCH_SECONDS.labels(self.backend).observe(elapsed)
+            EMBEDDED_TEXTS.labels(self.backend).inc(len(batch_idx))
+            if elapsed > 0:
+                EMBEDDING_THROUGHPUT.labels(self.backend).set(len(batch_idx) / elapsed)
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[batch_idx] = vectors
+        return result
+
+
+def _set_torch_threads(threads: int):
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _onnx_model_kwargs(onnx_file: Optional[str], threads: int) -> dict:
+    """Параметры ONNX Runtime: файл модели (например, int8) и число потоков"""
+    import onnxruntime
+
+    session_options = onnxruntime.SessionOptions()
+    if threads > 0:
+        session_options.intra_op_num_threads = threads
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+    if onnx_file:
+        model_kwargs["file_name"] = onnx_file
+    return model_kwargs
+
+
+def load_encoder(name: str, backend: str = "torch", model_path: Optional[str] = None, onnx_file: Optional[str] = None,
+                 batch_size: int = 64, threads: int = 0) -> EmbeddingEncoder:
+    """Загрузка модели embeddings выбранным бэкендом; model_path - локальный каталог модели вместо загрузки по имени"""
+    # sentence_transformers тянет torch - импортируем только при загрузке модели, а не при импорте сервиса
+    from sentence_transformers import SentenceTransformer
+
+    source = model_path or name
+
+    if backend == "onnx":
+        # Требует optimum[onnxruntime]; без onnx_file берется onnx/model.onnx из каталога модели
+        model = SentenceTransformer(source, device="cpu", backend="onnx", model_kwargs=_onnx_model_kwargs(onnx_file, threads))
+    elif backend == "torch_int8":
+        import torch
+
+        _set_torch_threads(threads)
+        model = SentenceTransformer(source, device="cpu")
+        # Динамическая int8 квантизация линейных слоев - веса int8, активации квантуются на лету
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        _set_torch_threads(threads)
+        model = SentenceTransformer(source)
+
+    logger.info(f"🧮 Embeddings: бэкенд {backend}, батч {batch_size}, потоков {threads or 'по умолчанию'}")
+    return EmbeddingEncoder(model, backend=backend, batch_size=batch_size)
@@ -0,0 +1,209 @@
+from typing import Callable, Dict, List, Optional, Set
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Персистентный кэш embeddings: memory-mapped float32 матрица + индекс hash → строка"""
+
+    MATRIX_FILE = "embeddings.f32"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, model_name: str, max_items: int = 50000, max_age_hours: int = 168,
+                 flush_interval_seconds: float = 30.0):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.max_age_seconds = max_age_hours * 3600
+        # Индекс переписывается на диск не чаще раза в flush_interval_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^\w.-]+", "_", model_name))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        # hash -> [номер строки, время последнего обращения]
+        self._index: Dict[str, List] = {}
+        self._free_rows: List[int] = []
+        self._dirty = False
+        self._flushed_at = 0.0
+
+        self._load()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Нормализация текста перед хэшированием"""
+        text = unicodedata.normalize("NFC", text or "")
+        return re.sub(r"\s+", " ", text).strip()
+
+    def make_key(self, text: str) -> str:
+        """Ключ кэша: модель + нормализованный текст"""
+        payload = f"{self.model_name}\x00{self.normalize_text(text)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _matrix_path(self) -> str:
+        return os.path.join(self.cache_dir, self.MATRIX_FILE)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _load(self):
+        """Загрузка индекса и матрицы с диска"""
+        try:
+            if not os.path.exists(self._index_path()) or not os.path.exists(self._matrix_path()):
+                return
+
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("model") != self.model_name or meta.get("capacity") != self.max_items:
+                logger.info("🔄 Параметры кэша embeddings изменились, кэш будет пересоздан")
+                return
+
+            self._dim = int(meta["dim"])
+            self._matrix = np.memmap(self._matrix_path(), dtype=np.float32, mode="r+", shape=(self.max_items, self._dim))
+            self._index = meta.get("entries", {})
+            used_rows = {entry[0] for entry in self._index.values()}
+            self._free_rows = [row for row in range(self.max_items - 1, -1, -1) if row not in used_rows]
+
+            self._evict_expired()
+            logger.info(f"✅ Кэш embeddings загружен: {len(self._index)} записей")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить кэш embeddings, начинаем с пустого: {e}")
+            self._dim = None
+            self._matrix = None
+            self._index = {}
+            self._free_rows = []
+
+    def _allocate(self, dim: int):
+        """Создание файла матрицы под заданную размерность"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._dim = dim
+        self._matrix = np.memmap(self._matrix_path(), dtype=np.float32, mode="w+", shape=(self.max_items, dim))
+        self._index = {}
+        self._free_rows = list(range(self.max_items - 1, -1, -1))
+
+    def _evict_expired(self):
+        """Удаление записей, к которым давно не обращались"""
+        if self.max_age_seconds <= 0:
+            return
+        deadline = time.time() - self.max_age_seconds
+        expired = [key for key, (_, last_access) in self._index.items() if last_access < deadline]
+        for key in expired:
+            self._free_rows.append(self._index.pop(key)[0])
+        self.evictions += len(expired)
+
+    def _evict_lru(self, count: int, keep: Set[str] = frozenset()):
+        """Освобождение строк по принципу LRU (кроме ключей keep)"""
+        candidates = (item for item in self._index.items() if item[0] not in keep)
+        oldest = sorted(candidates, key=lambda item: item[1][1])[:count]
+        for key, (row, _) in oldest:
+            del self._index[key]
+            self._free_rows.append(row)
+        self.evictions += len(oldest)
+
+    def _store(self, keys: List[str], vectors: np.ndarray, now: float):
+        """Запись новых embeddings в матрицу"""
+        if self._matrix is None or vectors.shape[1] != self._dim:
+            self._allocate(vectors.shape[1])
+
+        # Не пытаемся сохранить больше, чем помещается в кэш
+        keys = keys[-self.max_items:]
+        vectors = vectors[-self.max_items:]
+
+        # Ключ мог быть сохранен параллельным запросом с тем же промахом - его строка переиспользуется
+        shortage = sum(1 for key in keys if key not in self._index) - len(self._free_rows)
+        if shortage > 0:
+            self._evict_lru(shortage, keep=set(keys))
+
+        for key, vector in zip(keys, vectors):
+            entry = self._index.get(key)
+            row = entry[0] if entry is not None else self._free_rows.pop()
+            self._matrix[row] = vector
+            self._index[key] = [row, now]
+        self._dirty = True
+
+    def flush(self):
+        """Сохранение матрицы и индекса на диск"""
+        with self._lock:
+            if self._matrix is None or not self._dirty:
+                return
+            self._dirty = False
+            self._flushed_at = time.time()
+            self._matrix.flush()
+            meta = {
+                "model": self.model_name,
+                "dim": self._dim,
+                "capacity": self.max_items,
+                "entries": self._index,
+            }
+            tmp_path = self._index_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._index_path())
+
+    def encode(self, texts: List[str], encoder: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Возвращает embeddings для текстов, кодируя моделью только отсутствующие в кэше"""
+        if not texts:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+
+        keys = [self.make_key(text) for text in texts]
+        now = time.time()
+        result: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        # Одинаковые тексты внутри запроса кодируем один раз
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._index.get(key)
+                if entry is not None and self._matrix is not None:
+                    entry[1] = now
+                    result[i] = np.array(self._matrix[entry[0]])
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            miss_count = sum(len(positions) for positions in missing.values())
+            self.hits += len(texts) - miss_count
+            self.misses += miss_count
+
+        if missing:
+            missing_keys = list(missing.keys())
+            new_vectors = np.asarray(encoder([texts[missing[key][0]] for key in missing_keys]), dtype=np.float32)
+
+            with self._lock:
+                self._store(missing_keys, new_vectors, now)
+
+            for key, vector in zip(missing_keys, new_vectors):
+                for i in missing[key]:
+                    result[i] = vector
+
+            if time.time() - self._flushed_at >= self.flush_interval_seconds:
+                self.flush()
+
+        logger.info(f"💾 Кэш embeddings: {len(texts) - miss_count} попаданий, {miss_count} промахов")
+
+        return np.vstack(result).astype(np.float32)
+
+    def get_stats(self) -> dict:
+        """Статистика кэша"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "capacity": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
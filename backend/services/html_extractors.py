@@ -0,0 +1,391 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+import logging
+import re
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+class PostRecord(NamedTuple):
+    """Компактное представление поста для передачи между процессами"""
+    id: str
+    channel_name: str
+    publication_datetime: str
+    post_link: str
+    post_text: str
+    has_media: bool
+    timestamp: float
+
+
+# Блочные элементы, после которых в тексте поста ставится перенос строки
+BLOCK_TAGS = ('div', 'p')
+
+
+def clean_text(text: str) -> Optional[str]:
+    """Очистка лишних пробелов и переносов"""
+    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Убираем тройные+ переносы
+    text = re.sub(r'[ \t]+', ' ', text)  # Убираем лишние пробелы
+    text = text.strip()
+    return text if text else None
+
+
+def parse_post_time(datetime_str: str, post_id: str) -> Optional[datetime]:
+    """Разбор атрибута datetime из тега <time>"""
+    try:
+        # Обрабатываем разные форматы времени
+        if datetime_str.endswith('Z'):
+            post_time = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        elif '+' in datetime_str or datetime_str.endswith('00'):
+            post_time = datetime.fromisoformat(datetime_str)
+        else:
+            # Если нет timezone info, считаем UTC
+            post_time = datetime.fromisoformat(datetime_str).replace(tzinfo=timezone.utc)
+
+        logger.debug(f"📅 Пост {post_id}: время {post_time.isoformat()}")
+        return post_time
+
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка парсинга времени '{datetime_str}' для поста {post_id}: {e}")
+        return None
+
+
+def extract_numeric_post_id(data_post: str, post_link: str) -> Optional[int]:
+    """Числовой ID поста для курсора пагинации (?before=)"""
+    candidate = data_post.split('/')[-1] if data_post else post_link.split('?')[0].rstrip('/').split('/')[-1]
+    return int(candidate) if candidate.isdigit() else None
+
+
+def extract_formatted_text(text_elem) -> Optional[str]:
+    """Извлекает текст с сохранением базового форматирования (BeautifulSoup)"""
+    if not text_elem:
+        return None
+
+    # Заменяем <br> на переносы строк
+    for br in text_elem.find_all('br'):
+        br.replace_with('\n')
+
+    # Заменяем блочные элементы на переносы строк
+    for block in text_elem.find_all(list(BLOCK_TAGS)):
+        if block.get_text(strip=True):  # Только если есть текст
+            block.insert_after('\n')
+
+    # Получаем текст
+    return clean_text(text_elem.get_text())
+
+
+class BaseExtractor(ABC):
+    """Общий алгоритм разбора страницы; бэкенды реализуют только поиск элементов"""
+
+    name = "base"
+
+    @abstractmethod
+    def parse(self, html: str):
+        pass
+
+    @abstractmethod
+    def find_post_elements(self, document) -> list:
+        pass
+
+    @abstractmethod
+    def requires_auth(self, document) -> bool:
+        pass
+
+    @abstractmethod
+    def find_post_link(self, element) -> Optional[str]:
+        """href ссылки на пост или None, если ссылки нет"""
+        pass
+
+    @abstractmethod
+    def get_data_post(self, element) -> str:
+        pass
+
+    @abstractmethod
+    def find_datetime(self, element) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def extract_text(self, element) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def has_media(self, element) -> bool:
+        pass
+
+    def extract_page(self, html: str, channel: str) -> dict:
+        """Извлечение постов с одной страницы t.me/s/<channel> (без фильтра по времени, чтобы результат можно было кэшировать)"""
+        page = {
+            "posts": [],
+            "elements_found": 0,
+            "requires_auth": False,
+            "oldest_post_id": None,
+            "oldest_post_time": None,
+            "skipped_no_time": 0,
+            "skipped_no_content": 0,
+        }
+
+        document = self.parse(html)
+        post_elements = self.find_post_elements(document)
+
+        page["elements_found"] = len(post_elements)
+        if not post_elements:
+            # Проверяем, есть ли кнопка "View in Telegram" - это означает, что нужна авторизация
+            page["requires_auth"] = self.requires_auth(document)
+
+        for element in post_elements:
+            try:
+                # Извлекаем ID поста
+                post_link = self.find_post_link(element)
+                if post_link is None:
+                    continue
+
+                post_id = post_link.split('/')[-1] if post_link else str(len(page["posts"]))
+
+                numeric_id = extract_numeric_post_id(self.get_data_post(element), post_link)
+                if numeric_id is not None and (page["oldest_post_id"] is None or numeric_id < page["oldest_post_id"]):
+                    page["oldest_post_id"] = numeric_id
+
+                # Извлекаем время
+                datetime_str = self.find_datetime(element)
+                post_time = parse_post_time(datetime_str, post_id) if datetime_str else None
+
+                # Если время не найдено, пропускаем пост
+                if post_time is None:
+                    logger.debug(f"⏰ Пост {post_id}: время не найдено, пропускаем")
+                    page["skipped_no_time"] += 1
+                    continue
+
+                if page["oldest_post_time"] is None or post_time < page["oldest_post_time"]:
+                    page["oldest_post_time"] = post_time
+
+                post_text = self.extract_text(element)
+
+                # Добавляем только если есть содержательный текст
+                # Медиа-посты без текста пропускаем, так как они не несут информационной ценности для кластеризации
+                if post_text and len(post_text.strip()) > 10:  # Минимум 10 символов содержательного текста
+                    page["posts"].append(PostRecord(
+                        id=f"{channel}_http_{post_id}_{int(post_time.timestamp())}",
+                        channel_name=channel,
+                        publication_datetime=post_time.isoformat(),
+                        post_link=post_link or f"https://t.me/{channel}/{post_id}",
+                        post_text=post_text,
+                        has_media=self.has_media(element),
+                        timestamp=post_time.timestamp()
+                    ))
+                    logger.debug(f"✅ Пост {post_id}: добавлен ({post_time.isoformat()})")
+                else:
+                    logger.debug(f"⏭️ Пост {post_id}: пропущен (нет содержательного текста)")
+                    page["skipped_no_content"] += 1
+
+            except Exception as e:
+                logger.warning(f"Ошибка обработки поста в канале {channel}: {e}")
+                continue
+
+        return page
+
+
+class BeautifulSoupExtractor(BaseExtractor):
+    """Разбор через BeautifulSoup (html.parser) - эталонный fallback"""
+
+    name = "bs4"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def find_post_elements(self, document) -> list:
+        # Ищем посты в HTML - пробуем разные селекторы
+        post_elements = document.find_all('div', class_='tgme_widget_message')
+
+        # Если не найдены посты с классом tgme_widget_message, пробуем другие варианты
+        if not post_elements:
+            # Возможно, структура изменилась, пробуем другие селекторы
+            post_elements = document.find_all('div', class_='tgme_channel_post')
+            if not post_elements:
+                post_elements = document.find_all('article')
+            if not post_elements:
+                post_elements = document.find_all('div', class_='message')
+        return post_elements
+
+    def requires_auth(self, document) -> bool:
+        return bool(document.find('a', class_='tgme_action_button_new'))
+
+    def find_post_link(self, element) -> Optional[str]:
+        post_link_elem = element.find('a', class_='tgme_widget_message_date')
+        if not post_link_elem:
+            # Пробуем другие селекторы для ссылки на пост
+            post_link_elem = element.find('a', href=True)
+        if not post_link_elem:
+            return None
+        return post_link_elem.get('href', '')
+
+    def get_data_post(self, element) -> str:
+        return element.get('data-post') or ''
+
+    def find_datetime(self, element) -> Optional[str]:
+        time_elem = element.find('time')
+        if time_elem and time_elem.get('datetime'):
+            return time_elem['datetime']
+        return None
+
+    def extract_text(self, element) -> Optional[str]:
+        # Извлекаем текст поста - пробуем разные селекторы
+        text_elem = element.find('div', class_='tgme_widget_message_text')
+        if not text_elem:
+            text_elem = element.find('div', class_='message_text')
+        if not text_elem:
+            text_elem = element.find('div', class_='post_content')
+        return extract_formatted_text(text_elem)
+
+    def has_media(self, element) -> bool:
+        # Проверяем наличие медиа - пробуем разные селекторы
+        return bool(
+            element.find('a', class_='tgme_widget_message_photo_wrap') or
+            element.find('video') or
+            element.find('div', class_='tgme_widget_message_video') or
+            element.find('img') or
+            element.find('div', class_='media')
+        )
+
+
+def _has_class(name: str) -> str:
+    """XPath-условие, эквивалентное class_=name в BeautifulSoup"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if LXML_AVAILABLE:
+    # Селекторы компилируются один раз при импорте модуля
+    _XP_POSTS = [
+        etree.XPath(f"//div[{_has_class('tgme_widget_message')}]"),
+        etree.XPath(f"//div[{_has_class('tgme_channel_post')}]"),
+        etree.XPath("//article"),
+        etree.XPath(f"//div[{_has_class('message')}]"),
+    ]
+    _XP_AUTH_BUTTON = etree.XPath(f"boolean(//a[{_has_class('tgme_action_button_new')}])")
+    _XP_DATE_LINK = etree.XPath(f"(descendant::a[{_has_class('tgme_widget_message_date')}])[1]")
+    _XP_ANY_LINK = etree.XPath("(descendant::a[@href])[1]")
+    _XP_TIME = etree.XPath("(descendant::time)[1]")
+    _XP_TEXT = [
+        etree.XPath(f"(descendant::div[{_has_class('tgme_widget_message_text')}])[1]"),
+        etree.XPath(f"(descendant::div[{_has_class('message_text')}])[1]"),
+        etree.XPath(f"(descendant::div[{_has_class('post_content')}])[1]"),
+    ]
+    _XP_MEDIA = etree.XPath(
+        f"boolean(descendant::a[{_has_class('tgme_widget_message_photo_wrap')}]"
+        f" | descendant::video"
+        f" | descendant::div[{_has_class('tgme_widget_message_video')}]"
+        f" | descendant::img"
+        f" | descendant::div[{_has_class('media')}])"
+    )
+
+# Теги, строки внутри которых BeautifulSoup не включает в get_text()
+_NON_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+
+def _lxml_has_text(element) -> bool:
+    """Аналог block.get_text(strip=True) != '' для lxml"""
+    if element.tag in _NON_TEXT_TAGS:
+        return False
+    if element.text and element.text.strip():
+        return True
+    for child in element:
+        if isinstance(child.tag, str) and _lxml_has_text(child):
+            return True
+        if child.tail and child.tail.strip():
+            return True
+    return False
+
+
+def _lxml_collect_text(element, parts: List[str]):
+    """Обход дерева с теми же правилами, что и extract_formatted_text"""
+    if element.tag in _NON_TEXT_TAGS:
+        return
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        if isinstance(child.tag, str):
+            if child.tag == 'br':
+                parts.append('\n')
+            else:
+                _lxml_collect_text(child, parts)
+                if child.tag in BLOCK_TAGS and _lxml_has_text(child):
+                    parts.append('\n')
+        if child.tail:
+            parts.append(child.tail)
+
+
+class LxmlExtractor(BaseExtractor):
+    """Разбор через lxml (C-парсер) с заранее скомпилированными XPath-селекторами"""
+
+    name = "lxml"
+
+    def parse(self, html: str):
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # Строки с XML-объявлением кодировки lxml принимает только как байты
+            return lxml_html.document_fromstring(html.encode('utf-8'))
+
+    def find_post_elements(self, document) -> list:
+        for selector in _XP_POSTS:
+            post_elements = selector(document)
+            if post_elements:
+                return post_elements
+        return []
+
+    def requires_auth(self, document) -> bool:
+        return bool(_XP_AUTH_BUTTON(document))
+
+    def find_post_link(self, element) -> Optional[str]:
+        found = _XP_DATE_LINK(element) or _XP_ANY_LINK(element)
+        if not found:
+            return None
+        return found[0].get('href', '')
+
+    def get_data_post(self, element) -> str:
+        return element.get('data-post') or ''
+
+    def find_datetime(self, element) -> Optional[str]:
+        found = _XP_TIME(element)
+        if found and found[0].get('datetime'):
+            return found[0].get('datetime')
+        return None
+
+    def extract_text(self, element) -> Optional[str]:
+        for selector in _XP_TEXT:
+            found = selector(element)
+            if found:
+                parts: List[str] = []
+                _lxml_collect_text(found[0], parts)
+                return clean_text(''.join(parts))
+        return None
+
+    def has_media(self, element) -> bool:
+        return bool(_XP_MEDIA(element))
+
+
+def get_extractor(name: str = "auto") -> BaseExtractor:
+    """Выбор бэкенда разбора HTML: lxml при наличии, иначе BeautifulSoup"""
+    if name in ("auto", "lxml"):
+        if LXML_AVAILABLE:
+            return LxmlExtractor()
+        if name == "lxml":
+            logger.warning("⚠️ lxml не установлен, используем BeautifulSoup")
+    return BeautifulSoupExtractor()
+
+
+# Экземпляры бэкендов на процесс (в воркерах пула создаются при первом вызове)
+_extractors: Dict[str, BaseExtractor] = {}
+
+
+def extract_page(html: str, channel: str, extractor_name: str = "auto") -> dict:
+    """Точка входа для пула процессов: разбор страницы выбранным бэкендом"""
+    if extractor_name not in _extractors:
+        _extractors[extractor_name] = get_extractor(extractor_name)
+    return _extractors[extractor_name].extract_page(html, channel)
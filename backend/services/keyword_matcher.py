@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+NO_TEXT_CLUSTER_NAME = "Нет текста"
+UNCATEGORIZED_CLUSTER_NAME = "Некатегоризованные"
+
+# Категории по умолчанию, если файла с ключевыми словами нет
+DEFAULT_KEYWORD_CLUSTERS = {
+    "Искусственный интеллект": ["ai", "ии", "нейро", "ml", "машинное обучение", "gpt", "llm", "openai", "anthropic", "claude"],
+    "Вакансии": ["работа", "вакансия", "hiring", "job", "developer", "разработчик"],
+    "Новости": ["новости", "news", "обновление", "релиз", "анонс"],
+    "Мемы": ["мем", "😂", "🤣", "funny", "юмор", "прикол"],
+    "Криптовалюты": ["крипто", "bitcoin", "блокчейн", "ethereum", "btc", "eth"],
+    "Разработка": ["код", "программ", "разработ", "python", "javascript", "github"],
+    "Бизнес": ["стартап", "бизнес", "инвест", "деньги", "финансы"],
+    "Образование": ["курс", "обучение", "туториал", "урок", "лекция"],
+    "События": ["конференция", "митап", "событие", "встреча", "мероприятие"]
+}
+
+
+# Латинские ключевые слова длиннее этого - названия (python, openai, bitcoin), ищутся и внутри слов
+SHORT_ASCII_LENGTH = 3
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Регулярное выражение по префиксному дереву ключевых слов: в каждой позиции текста проверяется одна ветка"""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        # Длинные продолжения раньше конца слова - совпадение максимальной длины, короткие ключевые слова учитываются по префиксам
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+def _needs_word_start(keyword: str) -> bool:
+    """Короткие латинские и кириллические слова ("ai", "eth", "ии", "курс") дают ложные совпадения внутри слов; эмодзи и названия - нет"""
+    if not re.match(r"\w", keyword):
+        return False
+    return not (keyword.isascii() and len(keyword) > SHORT_ASCII_LENGTH)
+
+
+class KeywordMatcher:
+    """Скомпилированный поиск ключевых слов всех категорий за один проход: автомат Ахо-Корасик (pyahocorasick) или одно регулярное выражение"""
+
+    def __init__(self, keyword_clusters: Dict[str, List[str]], priorities: Optional[Dict[str, int]] = None,
+                 backend: str = "auto"):
+        self.keyword_clusters = keyword_clusters
+        # Порядок категорий в конфиге - последнее правило при равенстве очков и приоритета
+        self._rank = {
+            cluster_name: ((priorities or {}).get(cluster_name, 0), -position)
+            for position, cluster_name in enumerate(keyword_clusters)
+        }
+
+        categories: Dict[str, List[str]] = {}
+        for cluster_name, keywords in keyword_clusters.items():
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                if keyword:
+                    categories.setdefault(keyword, []).append(cluster_name)
+
+        # Найденное слово засчитывается каждой категории один раз, вместе с категориями ключевых слов-префиксов
+        # ("разработчик" - еще и "разработ"). Для слов с границей хранятся и категории на случай совпадения внутри слова
+        # (только префиксы без границы), для остальных граница не проверяется (None)
+        word_start = {keyword for keyword in categories if _needs_word_start(keyword)}
+        self._keywords: Dict[str, Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]]] = {}
+        for keyword in categories:
+            prefixes = [prefix for prefix in categories if keyword.startswith(prefix)]
+            at_word_start = tuple(dict.fromkeys(cluster_name for prefix in prefixes for cluster_name in categories[prefix]))
+            inside_word = tuple(dict.fromkeys(
+                cluster_name for prefix in prefixes if prefix not in word_start for cluster_name in categories[prefix]
+            )) if keyword in word_start else None
+            self._keywords[keyword] = (at_word_start, inside_word)
+
+        # В каждой позиции берется самое длинное ключевое слово, найденные отрезки не пересекаются
+        self.backend = "ahocorasick" if backend in ("auto", "ahocorasick") and AHOCORASICK_AVAILABLE else "regex"
+        if backend == "ahocorasick" and not AHOCORASICK_AVAILABLE:
+            logger.warning("⚠️ pyahocorasick не установлен, ключевые слова ищутся регулярным выражением")
+        self._automaton = None
+        self._pattern = None
+        if categories and self.backend == "ahocorasick":
+            self._automaton = ahocorasick.Automaton()
+            for keyword, (at_word_start, inside_word) in self._keywords.items():
+                self._automaton.add_word(keyword, (len(keyword), at_word_start, inside_word))
+            self._automaton.make_automaton()
+        elif categories:
+            self._pattern = re.compile(_trie_pattern(categories))
+
+    @staticmethod
+    def _at_word_start(text: str, lowered: str, position: int) -> bool:
+        """Начало слова или горб camelCase ("ChatGPT", "OpenAI"); регистр горба берется из исходного текста"""
+        if position == 0:
+            return True
+        previous = lowered[position - 1]
+        if not (previous.isalnum() or previous == "_"):
+            return True
+        return len(text) == len(lowered) and text[position].isupper() and text[position - 1].islower()
+
+    def match(self, text: Optional[str]) -> List[Tuple[str, int]]:
+        """Все подходящие категории с числом совпадений, лучшая первой (очки, затем приоритет, затем порядок)"""
+        if not text or not self._keywords:
+            return []
+        lowered = text.lower()
+
+        # Сначала считаем совпадения по наборам категорий, очки категорий - один раз на набор
+        hits: Dict[Tuple[str, ...], int] = {}
+        if self._automaton is not None:
+            for end, (length, matched_categories, inside_word) in self._automaton.iter_long(lowered):
+                # "said" и "ресурс" не дают "ai" и "курс": слово с границей внутри слова засчитывает только префиксы без границы
+                if inside_word is not None and not self._at_word_start(text, lowered, end - length + 1):
+                    matched_categories = inside_word
+                hits[matched_categories] = hits.get(matched_categories, 0) + 1
+        else:
+            keywords = self._keywords
+            for found in self._pattern.finditer(lowered):
+                matched_categories, inside_word = keywords[found.group()]
+                if inside_word is not None and not self._at_word_start(text, lowered, found.start()):
+                    matched_categories = inside_word
+                hits[matched_categories] = hits.get(matched_categories, 0) + 1
+
+        scores: Dict[str, int] = {}
+        for matched_categories, count in hits.items():
+            for cluster_name in matched_categories:
+                scores[cluster_name] = scores.get(cluster_name, 0) + count
+        return sorted(scores.items(), key=lambda item: (item[1], self._rank[item[0]]), reverse=True)
+
+    def classify(self, text: Optional[str]) -> str:
+        """Категория с наибольшим числом совпадений"""
+        if not text:
+            return NO_TEXT_CLUSTER_NAME
+        labels = self.match(text)
+        return labels[0][0] if labels else UNCATEGORIZED_CLUSTER_NAME
+
+
+def load_keyword_clusters(file_path: str) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+    """Категории из JSON: {"Категория": ["слово", ...]} или {"Категория": {"keywords": [...], "priority": 1}}"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    keyword_clusters, priorities = {}, {}
+    for cluster_name, value in data.items():
+        if isinstance(value, dict):
+            keyword_clusters[cluster_name] = list(value.get("keywords", []))
+            priorities[cluster_name] = int(value.get("priority", 0))
+        else:
+            keyword_clusters[cluster_name] = list(value)
+    return keyword_clusters, priorities
+
+
+class ReloadingKeywordMatcher:
+    """Матчер из файла категорий: пересобирается при изменении файла, не чаще раза в check_interval секунд"""
+
+    def __init__(self, file_path: str, check_interval: float = 5.0):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self._matcher = KeywordMatcher(DEFAULT_KEYWORD_CLUSTERS)
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> KeywordMatcher:
+        """Актуальный матчер; при ошибке в файле остается предыдущий"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._matcher
+
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._matcher
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.file_path)
+            except OSError:
+                return self._matcher
+            if mtime == self._mtime:
+                return self._matcher
+
+            try:
+                keyword_clusters, priorities = load_keyword_clusters(self.file_path)
+                self._matcher = KeywordMatcher(keyword_clusters, priorities)
+                logger.info(f"🔑 Загружено {len(keyword_clusters)} категорий ключевых слов из {self.file_path}")
+            except Exception as e:
+                logger.error(f"❌ Ошибка загрузки ключевых слов из {self.file_path}: {e}")
+            self._mtime = mtime
+            return self._matcher
+
+
+# Общий на процесс матчер fallback классификации
+keyword_matcher = ReloadingKeywordMatcher(settings.keyword_clusters_file, settings.keyword_clusters_reload_seconds)
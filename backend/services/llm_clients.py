@@ -0,0 +1,204 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import asyncio
+import json
+import logging
+import re
+import time
+
+import httpx
+
+from config.settings import settings
+from services.metrics import LLM_INVALID_RESPONSES, LLM_REQUEST_SECONDS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+JSON_RETRY_INSTRUCTION = "\n\nПредыдущий ответ не был корректным JSON. Ответь только JSON объектом, без пояснений и разметки."
+
+
+class LLMResponseError(Exception):
+    """Ответ LLM не удалось разобрать"""
+    pass
+
+
+def extract_json(text: str) -> dict:
+    """JSON объект из ответа модели: допускаются обертка ```json и текст вокруг объекта"""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        result = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise LLMResponseError(f"JSON не найден в ответе: {text[:200]}")
+        try:
+            result = json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(f"Некорректный JSON в ответе: {text[:200]}") from e
+    if not isinstance(result, dict):
+        raise LLMResponseError(f"Ожидался JSON объект: {text[:200]}")
+    return result
+
+
+class LLMClient(ABC):
+    """Асинхронный клиент LLM: пул соединений, таймаут каждого запроса и ограничение параллельных запросов"""
+
+    provider = ""
+
+    def __init__(self, model: str, base_url: str, api_key: Optional[str] = None, timeout: float = 30.0, max_concurrency: int = 5):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @abstractmethod
+    async def _request(self, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, int, int]:
+        """Запрос к API провайдера; возвращает (текст, токены запроса, токены ответа)"""
+        pass
+
+    async def complete(self, prompt: str, max_tokens: int = 256, json_mode: bool = False) -> str:
+        """Текст ответа модели; зависший запрос прерывается по таймауту"""
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                text, prompt_tokens, completion_tokens = await asyncio.wait_for(
+                    self._request(prompt, max_tokens, json_mode), timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                LLM_REQUEST_SECONDS.labels(self.provider, "timeout").observe(time.perf_counter() - started)
+                raise
+            except Exception:
+                LLM_REQUEST_SECONDS.labels(self.provider, "error").observe(time.perf_counter() - started)
+                raise
+            LLM_REQUEST_SECONDS.labels(self.provider, "ok").observe(time.perf_counter() - started)
+        LLM_TOKENS.labels(self.provider, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(self.provider, "completion").inc(completion_tokens)
+        return text.strip()
+
+    async def complete_json(self, prompt: str, max_tokens: int = 256, retries: int = 1) -> dict:
+        """JSON объект из ответа модели; при некорректном ответе запрос повторяется с уточнением"""
+        for attempt in range(retries + 1):
+            text = await self.complete(prompt if attempt == 0 else prompt + JSON_RETRY_INSTRUCTION, max_tokens, json_mode=True)
+            try:
+                return extract_json(text)
+            except LLMResponseError as e:
+                LLM_INVALID_RESPONSES.labels(self.provider).inc()
+                if attempt == retries:
+                    raise
+                logger.warning(f"⚠️ {self.provider}: некорректный JSON, повторяем запрос ({e})")
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class OpenAIClient(LLMClient):
+    """OpenAI и совместимые серверы (/chat/completions)"""
+
+    provider = "openai"
+
+    async def _request(self, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, int, int]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.3,
+            "max_tokens": max_tokens,
+        }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        response = await self._client.post(
+            f"{self.base_url}/chat/completions",
+            json=payload,
+            headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+        )
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        return data["choices"][0]["message"]["content"] or "", usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+
+
+class AnthropicClient(LLMClient):
+    """Anthropic Messages API"""
+
+    provider = "anthropic"
+
+    async def _request(self, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, int, int]:
+        response = await self._client.post(
+            f"{self.base_url}/messages",
+            json={
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "temperature": 0.3,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+            headers={"x-api-key": self.api_key or "", "anthropic-version": "2023-06-01"}
+        )
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        text = "".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text")
+        return text, usage.get("input_tokens") or 0, usage.get("output_tokens") or 0
+
+
+class GeminiClient(LLMClient):
+    """Google Gemini generateContent"""
+
+    provider = "gemini"
+
+    async def _request(self, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, int, int]:
+        generation_config = {"temperature": 0.3, "maxOutputTokens": max_tokens}
+        if json_mode:
+            generation_config["responseMimeType"] = "application/json"
+        response = await self._client.post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            # Ключ в заголовке, а не в URL - не попадает в логи запросов и прокси
+            headers={"x-goog-api-key": self.api_key or ""},
+            json={"contents": [{"parts": [{"text": prompt}]}], "generationConfig": generation_config}
+        )
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usageMetadata") or {}
+        parts = data["candidates"][0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts), usage.get("promptTokenCount") or 0, usage.get("candidatesTokenCount") or 0
+
+
+class OllamaClient(LLMClient):
+    """Локальная модель Ollama (/api/chat) - именование без внешней сети"""
+
+    provider = "ollama"
+
+    async def _request(self, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, int, int]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "options": {"temperature": 0.3, "num_predict": max_tokens},
+        }
+        if json_mode:
+            payload["format"] = "json"
+        response = await self._client.post(f"{self.base_url}/api/chat", json=payload)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("message", {}).get("content") or "", data.get("prompt_eval_count") or 0, data.get("eval_count") or 0
+
+
+def create_llm_client(provider: str) -> Optional[LLMClient]:
+    """Клиент выбранного провайдера; None - если провайдер отключен или для него нет ключа"""
+    options = {"timeout": settings.clustering_timeout, "max_concurrency": settings.max_concurrent_requests}
+    if provider == "openai" and settings.openai_api_key:
+        return OpenAIClient(settings.openai_model, settings.openai_base_url or OPENAI_BASE_URL, settings.openai_api_key, **options)
+    if provider == "anthropic" and settings.anthropic_api_key:
+        return AnthropicClient(settings.anthropic_model, ANTHROPIC_BASE_URL, settings.anthropic_api_key, **options)
+    if provider == "gemini" and settings.gemini_api_key:
+        return GeminiClient(settings.gemini_model, GEMINI_BASE_URL, settings.gemini_api_key, **options)
+    if provider == "ollama":
+        # Ollama не требует API ключа
+        return OllamaClient(settings.ollama_model, settings.ollama_base_url, **options)
+    return None
@@ -0,0 +1,140 @@
+from typing import Callable, Dict, FrozenSet, Optional
+import logging
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from utils.channel_loader import load_channels_from_file
+
+logger = logging.getLogger(__name__)
+
+# Метка канала для каналов вне config/channels.txt
+OTHER_CHANNEL_LABEL = "other"
+
+# Границы для сетевых и CPU этапов: от миллисекунд до минут
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Загрузка и разбор каналов
+CHANNEL_FETCH_SECONDS = Histogram(
+    "telegram_channel_fetch_seconds", "Время загрузки всех страниц канала", ["channel"], buckets=LATENCY_BUCKETS
+)
+PAGE_FETCH_SECONDS = Histogram(
+    "telegram_page_fetch_seconds", "Время HTTP запроса страницы t.me/s/", buckets=LATENCY_BUCKETS
+)
+PAGES_TOTAL = Counter(
+    "telegram_pages_total", "Страницы каналов по источнику ответа", ["source"]
+)
+BYTES_DOWNLOADED = Counter(
+    "telegram_bytes_downloaded_total", "Загружено байт HTML", ["channel"]
+)
+PAGE_PARSE_SECONDS = Histogram(
+    "telegram_page_parse_seconds", "Время разбора страницы", ["extractor"], buckets=LATENCY_BUCKETS
+)
+
+# Кластеризация
+CLUSTERING_STAGE_SECONDS = Histogram(
+    "clustering_stage_seconds", "Время этапов кластеризации", ["stage"], buckets=LATENCY_BUCKETS
+)
+KSWEEP_SECONDS = Histogram(
+    "clustering_k_sweep_seconds", "Время подбора количества кластеров", ["backend"], buckets=LATENCY_BUCKETS
+)
+EMBEDDING_BATCH_SECONDS = Histogram(
+    "embedding_batch_seconds", "Время кодирования одного батча", ["backend"], buckets=LATENCY_BUCKETS
+)
+EMBEDDED_TEXTS = Counter(
+    "embedding_texts_total", "Закодировано текстов моделью (без попаданий в кэш)", ["backend"]
+)
+EMBEDDING_THROUGHPUT = Gauge(
+    "embedding_throughput_texts_per_second", "Пропускная способность последнего батча", ["backend"]
+)
+
+# LLM
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Время запроса к LLM", ["provider", "outcome"], buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Токены запросов к LLM", ["provider", "kind"]
+)
+LLM_INVALID_RESPONSES = Counter(
+    "llm_invalid_responses_total", "Ответы LLM с некорректным JSON", ["provider"]
+)
+
+# API
+REQUEST_SECONDS = Histogram(
+    "api_request_seconds", "Время обработки запросов API", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+
+
+class CacheStatsCollector:
+    """Попадания и промахи кэшей сервиса - читаются из их get_stats() в момент сбора метрик"""
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Optional[dict]]] = {}
+
+    def register(self, name: str, get_stats: Callable[[], Optional[dict]]):
+        self._sources[name] = get_stats
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Попадания в кэш", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Промахи кэша", labels=["cache"])
+        entries = GaugeMetricFamily("cache_entries", "Записей в кэше", labels=["cache"])
+
+        for name, get_stats in self._sources.items():
+            try:
+                stats = get_stats()
+            except Exception as e:
+                logger.debug(f"Статистика кэша {name} недоступна: {e}")
+                continue
+            if not stats:
+                continue
+            # У кэша страниц несколько видов попаданий
+            hit_count = sum(value for key, value in stats.items() if key == "hits" or key.endswith("_hits"))
+            hits.add_metric([name], hit_count)
+            misses.add_metric([name], stats.get("misses", 0))
+            entries.add_metric([name], stats.get("entries", stats.get("vectors", 0)))
+
+        yield hits
+        yield misses
+        yield entries
+
+
+cache_stats = CacheStatsCollector()
+REGISTRY.register(cache_stats)
+
+
+class ChannelLabels:
+    """Значение метки channel: отслеживаемые каналы из файла, остальные - "other", чтобы число рядов метрик было ограничено"""
+
+    def __init__(self, file_path: str = "config/channels.txt", check_interval: float = 5.0):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self._channels: FrozenSet[str] = frozenset()
+        self._mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+
+    def get(self, channel: str) -> str:
+        """Метка для канала; список каналов перечитывается при изменении файла"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.file_path)
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                channels = load_channels_from_file(self.file_path) if mtime is not None else []
+                self._channels = frozenset(name.strip().lstrip("@").lower() for name in channels)
+
+        name = channel.strip().lstrip("@").lower()
+        return name if name in self._channels else OTHER_CHANNEL_LABEL
+
+
+channel_labels = ChannelLabels()
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Заголовок Server-Timing из длительностей этапов в секундах"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
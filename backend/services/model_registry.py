@@ -0,0 +1,105 @@
+from typing import Dict, Optional
+import asyncio
+import logging
+import threading
+
+from config.settings import settings
+from services.embedding_backends import EmbeddingEncoder, load_encoder
+from services.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingModelRegistry:
+    """Общие на процесс embedding модели: загружаются один раз, лениво или фоновым прогревом"""
+
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self):
+        self._models: Dict[str, EmbeddingEncoder] = {}
+        self._caches: Dict[str, Optional[EmbeddingCache]] = {}
+        self._status: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+
+    def _model_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._model_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> EmbeddingEncoder:
+        """Модель по имени; при первом обращении загружается (параллельные вызовы ждут одну загрузку)"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._model_lock(name):
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._status[name] = self.LOADING
+            try:
+                logger.info(f"🔄 Загружаем модель для embeddings: {name}...")
+                model = load_encoder(
+                    name,
+                    backend=settings.embedding_backend,
+                    model_path=settings.embedding_model_path,
+                    onnx_file=settings.embedding_onnx_file,
+                    batch_size=settings.embedding_batch_size,
+                    threads=settings.embedding_threads
+                )
+            except Exception as e:
+                self._status[name] = self.FAILED
+                self._errors[name] = str(e)
+                logger.error(f"❌ Ошибка загрузки embedding модели {name}: {e}")
+                raise
+
+            # Квантованные модели дают немного другие векторы - у каждого бэкенда свой кэш
+            cache_name = name if settings.embedding_backend == "torch" else f"{name}-{settings.embedding_backend}"
+            self._caches[name] = EmbeddingCache(
+                cache_dir=settings.embedding_cache_dir,
+                model_name=cache_name,
+                max_items=settings.embedding_cache_max_items,
+                max_age_hours=settings.embedding_cache_max_age_hours,
+                flush_interval_seconds=settings.embedding_cache_flush_interval_seconds
+            ) if settings.embedding_cache_enabled else None
+            self._models[name] = model
+            self._status[name] = self.READY
+            logger.info(f"✅ Embedding модель загружена: {name}")
+            return model
+
+    def get_cache(self, name: str) -> Optional[EmbeddingCache]:
+        """Кэш embeddings загруженной модели"""
+        return self._caches.get(name)
+
+    def flush(self):
+        """Сохранение кэшей embeddings на диск (при остановке сервера)"""
+        for cache in self._caches.values():
+            if cache is not None:
+                cache.flush()
+
+    def status(self, name: str) -> str:
+        """Состояние модели: not_loaded, loading, ready или failed"""
+        return self._status.get(name, self.NOT_LOADED)
+
+    def is_ready(self, name: str) -> bool:
+        return self.status(name) == self.READY
+
+    def is_available(self, name: str) -> bool:
+        """Модель загружена или может быть загружена (загрузка не падала)"""
+        return self.status(name) != self.FAILED
+
+    async def warm_up(self, name: str):
+        """Фоновая загрузка модели, не блокирующая event loop"""
+        try:
+            await asyncio.to_thread(self.get, name)
+        except Exception:
+            pass
+
+
+# Реестр на весь процесс: сервисы кластеризации для разных провайдеров используют одни и те же модели
+embedding_models = EmbeddingModelRegistry()
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import List, Optional
+import logging
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from sklearn.metrics import calinski_harabasz_score, pairwise_distances, silhouette_score
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelSelectionResult:
+    """Результат выбора количества кластеров"""
+    k: int
+    labels: np.ndarray
+    centers: Optional[np.ndarray]
+    score: float
+    metric: str
+
+
+def _fit_kmeans(embeddings: np.ndarray, k: int, random_state: int, n_init: int):
+    """Обучение KMeans для одного значения k"""
+    try:
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init)
+        labels = model.fit_predict(embeddings)
+        return k, labels, model.cluster_centers_, None
+    except Exception as e:
+        return k, None, None, e
+
+
+def _score_labels(embeddings: np.ndarray, labels: np.ndarray, metric: str,
+                  distances: Optional[np.ndarray], sample_idx: Optional[np.ndarray]) -> Optional[float]:
+    """Оценка разбиения; матрица расстояний считается заранее и переиспользуется"""
+    if metric == "calinski_harabasz":
+        return calinski_harabasz_score(embeddings, labels)
+
+    if sample_idx is not None:
+        labels = labels[sample_idx]
+    if len(set(labels)) < 2 or len(set(labels)) >= len(labels):
+        return None
+    return silhouette_score(distances, labels, metric="precomputed")
+
+
+def select_kmeans_model(embeddings: np.ndarray, candidate_ks: List[int], metric: str = "silhouette",
+                        sample_size: int = 2000, n_jobs: int = -1, random_state: int = 42,
+                        n_init: int = 10) -> Optional[ModelSelectionResult]:
+    """Обучает KMeans для всех k параллельно и выбирает лучшую модель без повторного обучения"""
+    if not candidate_ks:
+        return None
+
+    distances = None
+    sample_idx = None
+    if metric == "silhouette":
+        # Для больших выборок считаем silhouette по фиксированной подвыборке
+        if len(embeddings) > sample_size:
+            rng = np.random.RandomState(random_state)
+            sample_idx = np.sort(rng.choice(len(embeddings), size=sample_size, replace=False))
+            distances = pairwise_distances(embeddings[sample_idx])
+        else:
+            distances = pairwise_distances(embeddings)
+
+    fitted = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_fit_kmeans)(embeddings, k, random_state, n_init) for k in candidate_ks
+    )
+
+    best = None
+    for k, labels, centers, error in fitted:
+        if error is not None:
+            logger.warning(f"Ошибка при k={k}: {error}")
+            continue
+        if len(set(labels)) < 2:
+            continue
+
+        try:
+            score = _score_labels(embeddings, labels, metric, distances, sample_idx)
+        except Exception as e:
+            logger.warning(f"Ошибка оценки при k={k}: {e}")
+            continue
+
+        if score is None:
+            continue
+        logger.debug(f"k={k}: {metric}={score:.3f}")
+        if best is None or score > best.score:
+            best = ModelSelectionResult(k=k, labels=labels, centers=centers, score=score, metric=metric)
+
+    if best is None:
+        # Ни одно разбиение не удалось оценить - как и раньше, берем минимальное k
+        k, labels, centers, error = fitted[0]
+        if error is None:
+            best = ModelSelectionResult(k=k, labels=labels, centers=centers, score=float("nan"), metric=metric)
+
+    return best
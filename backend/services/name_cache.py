@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+
+class ClusterNameCache:
+    """LRU кэш названий кластеров с TTL; ключ - подпись репрезентативных постов"""
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # подпись -> (название, время сохранения)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_signature(representatives: List[str]) -> str:
+        """Подпись кластера: отсортированные хэши нормализованных текстов репрезентативных постов"""
+        hashes = sorted(
+            hashlib.sha1(re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip().encode("utf-8")).hexdigest()
+            for text in representatives
+        )
+        return hashlib.sha1("|".join(hashes).encode("utf-8")).hexdigest()
+
+    def get(self, signature: str) -> Optional[str]:
+        """Название по подписи, если оно еще не устарело"""
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is not None and time.time() - entry[1] >= self.ttl_seconds:
+                del self._entries[signature]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, signature: str, name: str):
+        """Сохранение названия"""
+        with self._lock:
+            self._entries[signature] = (name, time.time())
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        """Статистика кэша названий"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import threading
+import time
+
+
+@dataclass
+class CachedPage:
+    """Закэшированная страница канала вместе с результатом разбора"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    page: dict
+    fetched_at: float
+
+
+class PageCache:
+    """LRU кэш страниц t.me/s/ для условных запросов (ETag / Last-Modified)"""
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 2000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.fresh_hits = 0
+        self.not_modified_hits = 0
+        self.unchanged_content_hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Запись кэша для URL (без проверки TTL)"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        """Можно ли отдать запись без обращения к сети"""
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str, page: dict):
+        """Сохранение разобранной страницы"""
+        with self._lock:
+            self._entries[url] = CachedPage(
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=content_hash,
+                page=page,
+                fetched_at=time.time()
+            )
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, url: str):
+        """Продление TTL записи после подтверждения, что страница не изменилась"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.fetched_at = time.time()
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedPage]) -> dict:
+        """Заголовки If-None-Match / If-Modified-Since для записи"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def get_stats(self) -> dict:
+        """Статистика кэша страниц"""
+        return {
+            "entries": len(self._entries),
+            "fresh_hits": self.fresh_hits,
+            "not_modified_hits": self.not_modified_hits,
+            "unchanged_content_hits": self.unchanged_content_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from models.post import RawPost
+from services.post_store import PostStore
+from services.telegram_parser import TelegramParser
+
+logger = logging.getLogger(__name__)
+
+
+def _plan_fetch(post_store: PostStore, channels: List[str], window_start: float) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Отметки догрузки и покрытие каналов: догружаем только новые посты, если хранилище покрывает окно целиком"""
+    coverage = post_store.get_coverage(channels)
+    high_water_marks = post_store.get_high_water_marks(channels)
+    # Окно шире загруженного интервала - канал перечитывается до начала окна
+    since = {
+        channel: mark for channel, mark in high_water_marks.items()
+        if channel in coverage and coverage[channel] <= window_start
+    }
+    return since, coverage
+
+
+def _store_channel_posts(post_store: PostStore, channel: str, new_posts: List[RawPost], error: Optional[str],
+                         covered_since: Optional[float], window_start: float, limit: int) -> int:
+    """Сохранение постов канала и обновление начала непрерывно загруженного интервала"""
+    saved = post_store.upsert_posts(new_posts)
+    if error is None:
+        # Канал прочитан до отметки или до начала окна; при упоре в limit окно все равно покрыто его самыми свежими постами
+        if covered_since is None or covered_since > window_start or len(new_posts) >= limit:
+            covered_since = window_start
+        post_store.set_coverage(channel, covered_since)
+    elif new_posts:
+        # Частичная загрузка: непрерывен только интервал от самого старого полученного поста
+        post_store.set_coverage(channel, min(datetime.fromisoformat(post.publication_datetime).timestamp() for post in new_posts))
+    return saved
+
+
+async def fetch_posts(telegram_parser: TelegramParser, post_store: Optional[PostStore],
+                      channels: List[str], hours_back: int, limit: int) -> List[RawPost]:
+    """Получение постов за окно: без хранилища - парсингом, с хранилищем - догрузкой новых и индексным запросом"""
+    if post_store is None:
+        return await telegram_parser.parse_channels(channels=channels, hours_back=hours_back, limit=limit)
+
+    window_start = time.time() - hours_back * 3600
+    since, coverage = await asyncio.to_thread(_plan_fetch, post_store, channels, window_start)
+    saved = 0
+    async for channel, new_posts, error in telegram_parser.iter_channels(channels, hours_back, limit, since=since):
+        saved += await asyncio.to_thread(
+            _store_channel_posts, post_store, channel, new_posts, error, coverage.get(channel), window_start, limit
+        )
+    logger.info(f"💾 Сохранено новых постов: {saved}")
+
+    return await asyncio.to_thread(post_store.query, channels, window_start, None, limit)
+
+
+async def iter_channel_posts(telegram_parser: TelegramParser, post_store: Optional[PostStore],
+                             channels: List[str], hours_back: int, limit: int) -> AsyncIterator[Tuple[str, List[RawPost], Optional[str]]]:
+    """Посты за окно по каналам в порядке готовности: (канал, посты, ошибка)"""
+    if post_store is None:
+        async for channel, new_posts, error in telegram_parser.iter_channels(channels, hours_back, limit):
+            yield channel, new_posts, error
+        return
+
+    window_start = time.time() - hours_back * 3600
+    since, coverage = await asyncio.to_thread(_plan_fetch, post_store, channels, window_start)
+    async for channel, new_posts, error in telegram_parser.iter_channels(channels, hours_back, limit, since=since):
+        await asyncio.to_thread(
+            _store_channel_posts, post_store, channel, new_posts, error, coverage.get(channel), window_start, limit
+        )
+        # Даже если канал не ответил, отдаем то, что уже есть в хранилище
+        yield channel, await asyncio.to_thread(post_store.query, [channel], window_start, None, limit), error
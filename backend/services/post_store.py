@@ -0,0 +1,203 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from models.post import RawPost
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    channel_name TEXT NOT NULL,
+    publication_ts REAL NOT NULL,
+    publication_datetime TEXT NOT NULL,
+    post_link TEXT NOT NULL,
+    post_text TEXT,
+    has_media INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_channel_time ON posts (channel_name, publication_ts);
+CREATE INDEX IF NOT EXISTS idx_posts_time ON posts (publication_ts);
+-- Начало непрерывно загруженного интервала канала: от covered_since_ts до самого свежего поста хранилище полное
+CREATE TABLE IF NOT EXISTS channel_coverage (
+    channel_name TEXT PRIMARY KEY,
+    covered_since_ts REAL NOT NULL
+);
+"""
+
+
+class PostStore:
+    """Локальное хранилище постов (SQLite) с индексом по (канал, время публикации)"""
+
+    def __init__(self, db_path: str, retention_days: int = 30):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        logger.info(f"✅ Хранилище постов: {db_path}")
+
+    def upsert_posts(self, posts: List[RawPost]) -> int:
+        """Сохранение постов; существующие записи обновляются"""
+        if not posts:
+            return 0
+
+        now = time.time()
+        rows = [
+            (
+                post.id,
+                post.channel_name,
+                datetime.fromisoformat(post.publication_datetime).timestamp(),
+                post.publication_datetime,
+                post.post_link,
+                post.post_text,
+                int(post.has_media),
+                now,
+            )
+            for post in posts
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO posts (id, channel_name, publication_ts, publication_datetime, post_link, post_text, has_media, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    post_text = excluded.post_text,
+                    has_media = excluded.has_media,
+                    fetched_at = excluded.fetched_at
+                """,
+                rows
+            )
+        return len(rows)
+
+    def get_high_water_marks(self, channels: List[str]) -> Dict[str, float]:
+        """Время самого свежего сохраненного поста для каждого канала"""
+        if not channels:
+            return {}
+        placeholders = ",".join("?" * len(channels))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT channel_name, MAX(publication_ts) FROM posts WHERE channel_name IN ({placeholders}) GROUP BY channel_name",
+                channels
+            )
+            return {channel: ts for channel, ts in cursor.fetchall()}
+
+    def get_coverage(self, channels: List[str]) -> Dict[str, float]:
+        """Начало непрерывно загруженного интервала для каждого канала"""
+        if not channels:
+            return {}
+        placeholders = ",".join("?" * len(channels))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT channel_name, covered_since_ts FROM channel_coverage WHERE channel_name IN ({placeholders})",
+                channels
+            )
+            return {channel: ts for channel, ts in cursor.fetchall()}
+
+    def set_coverage(self, channel: str, covered_since_ts: float):
+        """Сохранение начала непрерывно загруженного интервала канала"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO channel_coverage (channel_name, covered_since_ts) VALUES (?, ?)
+                ON CONFLICT(channel_name) DO UPDATE SET covered_since_ts = excluded.covered_since_ts
+                """,
+                (channel, covered_since_ts)
+            )
+
+    def query(self, channels: List[str], since_ts: float, until_ts: Optional[float] = None,
+              limit_per_channel: Optional[int] = None) -> List[RawPost]:
+        """Посты каналов за интервал (новые сначала) - индексный запрос по (канал, время); не больше limit_per_channel свежих постов на канал"""
+        if not channels:
+            return []
+        placeholders = ",".join("?" * len(channels))
+        params: List = list(channels) + [since_ts]
+        columns = "id, channel_name, publication_datetime, post_link, post_text, has_media, publication_ts"
+        sql = f"SELECT {columns} FROM posts WHERE channel_name IN ({placeholders}) AND publication_ts >= ?"
+        if until_ts is not None:
+            sql += " AND publication_ts <= ?"
+            params.append(until_ts)
+        if limit_per_channel is not None:
+            # Номер поста внутри канала по свежести - оконная функция поверх индекса (канал, время)
+            sql = sql.replace(
+                f"SELECT {columns}",
+                f"SELECT {columns}, ROW_NUMBER() OVER (PARTITION BY channel_name ORDER BY publication_ts DESC) AS channel_rank",
+                1
+            )
+            sql = f"SELECT {columns} FROM ({sql}) WHERE channel_rank <= ?"
+            params.append(limit_per_channel)
+        sql += " ORDER BY publication_ts DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            RawPost(
+                id=row[0],
+                channel_name=row[1],
+                publication_datetime=row[2],
+                post_link=row[3],
+                post_text=row[4],
+                has_media=bool(row[5])
+            )
+            for row in rows
+        ]
+
+    def get_posts(self, post_ids: List[str]) -> Dict[str, RawPost]:
+        """Посты по идентификаторам"""
+        if not post_ids:
+            return {}
+        placeholders = ",".join("?" * len(post_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel_name, publication_datetime, post_link, post_text, has_media FROM posts "
+                f"WHERE id IN ({placeholders})",
+                post_ids
+            ).fetchall()
+
+        return {
+            row[0]: RawPost(
+                id=row[0],
+                channel_name=row[1],
+                publication_datetime=row[2],
+                post_link=row[3],
+                post_text=row[4],
+                has_media=bool(row[5])
+            )
+            for row in rows
+        }
+
+    def prune(self) -> List[str]:
+        """Удаление постов старше срока хранения; возвращает идентификаторы удаленных постов"""
+        if self.retention_days <= 0:
+            return []
+        deadline = time.time() - self.retention_days * 86400
+        with self._lock, self._conn:
+            post_ids = [row[0] for row in self._conn.execute("SELECT id FROM posts WHERE publication_ts < ?", (deadline,))]
+            self._conn.execute("DELETE FROM posts WHERE publication_ts < ?", (deadline,))
+            # Удаленные посты больше не входят в загруженный интервал
+            self._conn.execute("UPDATE channel_coverage SET covered_since_ts = ? WHERE covered_since_ts < ?", (deadline, deadline))
+        if post_ids:
+            logger.info(f"🧹 Удалено устаревших постов из хранилища: {len(post_ids)}")
+        return post_ids
+
+    def count(self) -> int:
+        """Количество сохраненных постов"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+from services.snapshot_scheduler import normalize_channels
+
+# Откуда получен результат
+SOURCE_CACHE = "cache"
+SOURCE_COALESCED = "coalesced"
+SOURCE_COMPUTED = "computed"
+
+
+def make_posts_key(channels: Iterable[str], hours_back: int) -> Tuple:
+    """Ключ запроса /posts: нормализованный набор каналов (без @, регистра и порядка) и окно"""
+    return ("posts", normalize_channels(channels), hours_back)
+
+
+def make_cluster_key(posts: Iterable[Any], provider: Optional[str]) -> Tuple:
+    """Ключ запроса /cluster: хэш всех полей постов (без учета порядка) и провайдер LLM"""
+    # Из кэша отдаются посты целиком - ключ должен различать и ссылки, даты, медиа, а не только тексты
+    digest = hashlib.sha1()
+    for serialized in sorted(json.dumps(post.dict(), sort_keys=True, ensure_ascii=False, default=str) for post in posts):
+        digest.update(serialized.encode("utf-8"))
+        digest.update(b"\0")
+    return ("cluster", provider, digest.hexdigest())
+
+
+class ResultCache:
+    """LRU кэш результатов с коротким TTL и объединением одновременных одинаковых запросов (single-flight)"""
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 32):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # ключ -> (результат, время сохранения)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        # ключ -> выполняющееся вычисление
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.hits = 0
+        self.coalesced_hits = 0
+        self.misses = 0
+
+    def _get_fresh(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if time.time() - entry[1] >= self.ttl_seconds:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def _store(self, key: Hashable, task: asyncio.Task):
+        """Завершение вычисления: успешный результат кэшируется, ошибка - нет"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (task.result(), time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Результат из кэша, из уже выполняющегося вычисления или нового; возвращает (результат, источник)"""
+        found, value = self._get_fresh(key)
+        if found:
+            self.hits += 1
+            return value, SOURCE_CACHE
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_hits += 1
+            source = SOURCE_COALESCED
+        else:
+            self.misses += 1
+            source = SOURCE_COMPUTED
+            # Отдельная задача: отключение клиента, запустившего вычисление, не отменяет его для остальных
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._store(key, done))
+
+        return await asyncio.shield(task), source
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Удаление результата по ключу или всего кэша"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """Статистика кэша результатов"""
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "coalesced_hits": self.coalesced_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from models.clustering import ClusteredPost, ClusterStats
+from services.post_ingestion import fetch_posts
+from services.post_store import PostStore
+from services.vector_index import VectorIndex
+from services.telegram_parser import TelegramParser
+from utils.channel_loader import load_channels_from_file
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_channels(channels: Iterable[str]) -> Tuple[str, ...]:
+    """Канонический набор каналов для сравнения запросов"""
+    return tuple(sorted({channel.strip().lstrip('@').lower() for channel in channels if channel.strip()}))
+
+
+@dataclass(frozen=True)
+class PostsSnapshot:
+    """Неизменяемый результат фонового обновления"""
+    posts: Tuple[ClusteredPost, ...]
+    clusters: Tuple[ClusterStats, ...]
+    channels: Tuple[str, ...]
+    hours_back: int
+    created_at: float
+    build_time_seconds: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+
+class SnapshotScheduler:
+    """Фоновое обновление каналов из файла и публикация кластеризованного снапшота"""
+
+    def __init__(self, telegram_parser: TelegramParser, post_store: Optional[PostStore],
+                 get_clustering_service: Callable, interval_seconds: int, hours_back: int, posts_limit: int,
+                 vector_index: Optional[VectorIndex] = None):
+        self.telegram_parser = telegram_parser
+        self.post_store = post_store
+        self.vector_index = vector_index
+        self.get_clustering_service = get_clustering_service
+        self.interval_seconds = interval_seconds
+        self.hours_back = hours_back
+        self.posts_limit = posts_limit
+
+        self.snapshot: Optional[PostsSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def matches(self, channels: List[str], hours_back: int) -> bool:
+        """Можно ли ответить на запрос из снапшота"""
+        if hours_back != self.hours_back:
+            return False
+        return normalize_channels(channels) == normalize_channels(load_channels_from_file())
+
+    async def refresh(self) -> Optional[PostsSnapshot]:
+        """Построение нового снапшота; параллельные вызовы дожидаются одного обновления"""
+        started_waiting = time.time()
+        async with self._refresh_lock:
+            # Пока ждали блокировку, снапшот мог обновить другой вызов
+            if self.snapshot is not None and self.snapshot.created_at >= started_waiting:
+                return self.snapshot
+
+            channels = load_channels_from_file()
+            if not channels:
+                logger.warning("⚠️ Список каналов пуст, снапшот не обновлен")
+                return self.snapshot
+
+            started = time.time()
+            logger.info(f"🔄 Обновляем снапшот: {len(channels)} каналов за {self.hours_back}ч")
+
+            raw_posts = await fetch_posts(
+                self.telegram_parser,
+                self.post_store,
+                channels=channels,
+                hours_back=self.hours_back,
+                limit=self.posts_limit
+            )
+            cluster_stats = []
+            clustered_posts = await self.get_clustering_service().cluster_posts(raw_posts, cluster_stats=cluster_stats) if raw_posts else []
+
+            self.snapshot = PostsSnapshot(
+                posts=tuple(clustered_posts),
+                clusters=tuple(cluster_stats),
+                channels=normalize_channels(channels),
+                hours_back=self.hours_back,
+                created_at=time.time(),
+                build_time_seconds=time.time() - started
+            )
+            logger.info(f"✅ Снапшот обновлен за {self.snapshot.build_time_seconds:.2f} секунд: {len(clustered_posts)} постов")
+            return self.snapshot
+
+    async def _run(self):
+        """Периодическое обновление снапшота"""
+        while True:
+            try:
+                await self.refresh()
+                if self.post_store is not None:
+                    pruned_ids = await asyncio.to_thread(self.post_store.prune)
+                    # Индекс похожих постов следует сроку хранения постов
+                    if pruned_ids and self.vector_index is not None:
+                        await asyncio.to_thread(self.vector_index.remove, pruned_ids)
+                # Снапшот пополнил индекс похожих постов - сохраняем его, не дожидаясь интервала
+                if self.vector_index is not None:
+                    await asyncio.to_thread(self.vector_index.flush)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка фонового обновления снапшота: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Запуск фоновой задачи"""
+        if self._task is None or self._task.done():
+            logger.info(f"⏰ Фоновое обновление снапшота каждые {self.interval_seconds} секунд")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановка фоновой задачи"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,198 +1,374 @@
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import logging
 import asyncio
 import random
-from concurrent.futures import ThreadPoolExecutor
-import re
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import os
+import hashlib
+import time
 import httpx
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 
 from models.post import RawPost
+from config.settings import settings
+from services.page_cache import PageCache
+from services.html_extractors import extract_formatted_text, extract_page, get_extractor
+from services.metrics import BYTES_DOWNLOADED, CHANNEL_FETCH_SECONDS, PAGE_FETCH_SECONDS, PAGE_PARSE_SECONDS, PAGES_TOTAL, channel_labels
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ChannelFetchError(Exception):
+    """Канал загружен не полностью: posts - посты с уже полученных страниц"""
+
+    def __init__(self, message: str, posts: Optional[List[RawPost]] = None):
+        super().__init__(message)
+        self.posts = posts or []
+
+
+class ChannelTimeoutError(TimeoutError):
+    """Время канала на запросы исчерпано"""
+    pass
+
+
+class ChannelBudget:
+    """Время канала на запросы и паузы между повторами; ожидание слота хоста не отсчитывается"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.remaining = seconds
+
+    async def run(self, request):
+        """Запрос с ограничением по оставшемуся времени канала"""
+        if self.remaining <= 0:
+            request.close()
+            raise ChannelTimeoutError(f"канал не ответил за {self.seconds:.0f}с")
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(request, timeout=self.remaining)
+        except asyncio.TimeoutError:
+            raise ChannelTimeoutError(f"канал не ответил за {self.seconds:.0f}с") from None
+        finally:
+            self.remaining -= time.perf_counter() - started
+
+    async def sleep(self, delay: float):
+        """Пауза перед повтором за счет времени канала; если времени не хватит, повтор не делаем"""
+        if delay >= self.remaining:
+            raise ChannelTimeoutError(f"канал не ответил за {self.seconds:.0f}с: нет времени на повтор через {delay:.1f}с")
+        self.remaining -= delay
+        await asyncio.sleep(delay)
+
+
 class TelegramParser:
-    def __init__(self, max_workers: int = 5):
-        self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.parse_workers or os.cpu_count() or 1
+        # Пул для CPU-нагруженного разбора HTML, чтобы не блокировать event loop
+        self.executor = self._create_executor()
         
-    def _extract_formatted_text(self, text_elem) -> str:
-        """Извлекает текст с сохранением базового форматирования"""
-        if not text_elem:
-            return None
+        # Общий пул соединений на весь срок жизни парсера
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        # Бэкенд разбора HTML (lxml или BeautifulSoup)
+        self.extractor = get_extractor(settings.html_extractor)
+        logger.info(f"🧩 Разбор HTML: {self.extractor.name}")
+        
+        # Кэш страниц каналов для условных запросов
+        self.page_cache = PageCache(
+            ttl_seconds=settings.page_cache_ttl_seconds,
+            max_entries=settings.page_cache_max_entries
+        ) if settings.page_cache_enabled else None
+        
+    def _create_executor(self) -> Optional[Executor]:
+        """Создание пула для разбора страниц согласно настройкам"""
+        if settings.parse_executor == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        if settings.parse_executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        return None
+    
+    async def _run_extraction(self, html: str, channel: str) -> dict:
+        """Разбор страницы в пуле с замером времени"""
+        started = time.perf_counter()
+        try:
+            return await self._extract_in_executor(html, channel)
+        finally:
+            PAGE_PARSE_SECONDS.labels(self.extractor.name).observe(time.perf_counter() - started)
+    
+    async def _extract_in_executor(self, html: str, channel: str) -> dict:
+        """Разбор страницы в пуле; при сбое пула - в текущем потоке"""
+        if self.executor is None:
+            return extract_page(html, channel, self.extractor.name)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, extract_page, html, channel, self.extractor.name)
+        except BrokenExecutor as e:
+            logger.error(f"❌ Пул разбора HTML недоступен, пересоздаем: {e}")
+            self.executor = self._create_executor()
+            return extract_page(html, channel, self.extractor.name)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Ленивая инициализация общего HTTP клиента с keep-alive"""
+        if self._client is None or self._client.is_closed:
+            use_http2 = settings.http2_enabled and HTTP2_AVAILABLE
+            if settings.http2_enabled and not HTTP2_AVAILABLE:
+                logger.warning("⚠️ Пакет h2 не установлен, используем HTTP/1.1")
+            self._client = httpx.AsyncClient(
+                timeout=settings.http_timeout,
+                follow_redirects=True,
+                http2=use_http2,
+                limits=httpx.Limits(
+                    max_connections=settings.max_concurrent_requests * 2,
+                    max_keepalive_connections=settings.max_concurrent_requests,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+    
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Семафор, ограничивающий число одновременных запросов к одному хосту"""
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(settings.max_concurrent_requests)
+        return self._host_semaphores[host]
+    
+    async def _fetch(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                     budget: Optional[ChannelBudget] = None) -> httpx.Response:
+        """GET запрос с ограничением параллелизма и повтором при 429/5xx; budget - время канала на запросы"""
+        client = self._get_client()
+        semaphore = self._get_host_semaphore(url)
+        
+        for attempt in range(settings.http_max_retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    # Время ожидания слота хоста не расходует время канала
+                    request = client.get(url, params=params, headers=headers)
+                    response = await (budget.run(request) if budget is not None else request)
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                if attempt == settings.http_max_retries:
+                    response.raise_for_status()
+                retry_after = response.headers.get("Retry-After")
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt == settings.http_max_retries:
+                    raise
+                reason = str(e) or e.__class__.__name__
             
-        # Заменяем <br> на переносы строк
-        for br in text_elem.find_all('br'):
-            br.replace_with('\n')
+            # Экспоненциальная задержка с джиттером; Retry-After от сервера имеет приоритет
+            delay = settings.http_backoff_base * (2 ** attempt) + random.uniform(0, settings.http_backoff_base)
+            if retry_after and retry_after.isdigit():
+                if float(retry_after) > settings.http_timeout:
+                    # Сервер просит ждать дольше таймаута запроса - не держим воркер, отдаем ошибку
+                    logger.warning(f"⏳ {url}: Retry-After {retry_after}с больше таймаута {settings.http_timeout:.0f}с, запрос прерван")
+                    response.raise_for_status()
+                delay = max(delay, float(retry_after))
+            delay = min(delay, settings.http_timeout)
+            logger.warning(f"🔁 {url}: {reason}, повтор через {delay:.1f}с (попытка {attempt + 1}/{settings.http_max_retries})")
+            await (budget.sleep(delay) if budget is not None else asyncio.sleep(delay))
+    
+    async def _fetch_page(self, base_url: str, channel: str, before: Optional[int] = None,
+                          budget: Optional[ChannelBudget] = None) -> dict:
+        """Загрузка и разбор страницы канала с использованием кэша страниц"""
+        url = f"{base_url}?before={before}" if before is not None else base_url
+        cached = self.page_cache.get(url) if self.page_cache else None
+        
+        if cached is not None and self.page_cache.is_fresh(cached):
+            self.page_cache.fresh_hits += 1
+            PAGES_TOTAL.labels("cache").inc()
+            logger.debug(f"💾 {url}: страница взята из кэша без запроса")
+            return cached.page
+        
+        started = time.perf_counter()
+        response = await self._fetch(url, headers=PageCache.conditional_headers(cached), budget=budget)
+        PAGE_FETCH_SECONDS.observe(time.perf_counter() - started)
+        BYTES_DOWNLOADED.labels(channel_labels.get(channel)).inc(len(response.content))
         
-        # Заменяем блочные элементы на переносы строк
-        for block in text_elem.find_all(['div', 'p']):
-            if block.get_text(strip=True):  # Только если есть текст
-                block.insert_after('\n')
+        if cached is not None and response.status_code == 304:
+            PAGES_TOTAL.labels("not_modified").inc()
+            self.page_cache.not_modified_hits += 1
+            self.page_cache.touch(url)
+            logger.debug(f"💾 {url}: 304 Not Modified")
+            return cached.page
         
-        # Получаем текст
-        text = text_elem.get_text()
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        if cached is not None and cached.content_hash == content_hash:
+            PAGES_TOTAL.labels("unchanged").inc()
+            self.page_cache.unchanged_content_hits += 1
+            self.page_cache.touch(url)
+            logger.debug(f"💾 {url}: содержимое не изменилось, пропускаем разбор")
+            return cached.page
         
-        # Очищаем лишние пробелы и переносы
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Убираем тройные+ переносы
-        text = re.sub(r'[ \t]+', ' ', text)  # Убираем лишние пробелы
-        text = text.strip()
+        page = await self._run_extraction(response.text, channel)
+        PAGES_TOTAL.labels("parsed").inc()
         
-        return text if text else None
+        if self.page_cache:
+            self.page_cache.misses += 1
+            self.page_cache.put(
+                url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=content_hash,
+                page=page
+            )
+        return page
     
-    async def _parse_channel_with_http(self, channel: str, hours_back: int = 24, limit: int = 50) -> List[RawPost]:
-        """Парсинг через HTTP запросы к t.me"""
-        posts = []
+    async def close(self):
+        """Закрытие общего HTTP клиента"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        
+    def _extract_formatted_text(self, text_elem) -> str:
+        """Извлекает текст с сохранением базового форматирования"""
+        return extract_formatted_text(text_elem)
+    
+    async def _parse_channel_with_http(self, channel: str, hours_back: int = 24, limit: int = 50,
+                                       since_timestamp: Optional[float] = None, budget: Optional[ChannelBudget] = None) -> List[RawPost]:
+        """Парсинг через HTTP запросы к t.me с пагинацией по курсору ?before=; при сбое - ChannelFetchError с уже собранными постами"""
+        posts = {}
         # Используем UTC timezone для корректного сравнения
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
+        # Посты старше отметки уже есть в хранилище - за ними не ходим
+        if since_timestamp is not None and since_timestamp > cutoff_time.timestamp():
+            cutoff_time = datetime.fromtimestamp(since_timestamp, timezone.utc)
+        cutoff_timestamp = cutoff_time.timestamp()
         logger.info(f"🕒 Фильтруем посты новее {cutoff_time.isoformat()} (последние {hours_back}ч)")
         
         try:
-            url = f"https://t.me/s/{channel}"
-            logger.info(f"🌐 Попытка HTTP парсинга канала {channel}: {url}")
+            base_url = f"{settings.telegram_base_url}/s/{channel}"
+            logger.info(f"🌐 Попытка HTTP парсинга канала {channel}: {base_url}")
             
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Ищем посты в HTML - пробуем разные селекторы
-                post_elements = soup.find_all('div', class_='tgme_widget_message')
-                
-                # Если не найдены посты с классом tgme_widget_message, пробуем другие варианты
-                if not post_elements:
-                    # Возможно, структура изменилась, пробуем другие селекторы
-                    post_elements = soup.find_all('div', class_='tgme_channel_post')
-                    if not post_elements:
-                        post_elements = soup.find_all('article')
-                    if not post_elements:
-                        post_elements = soup.find_all('div', class_='message')
-                
-                logger.info(f"🔍 Найдено {len(post_elements)} элементов постов в HTML")
+            skipped_old = 0
+            skipped_no_time = 0
+            skipped_no_content = 0
+            pages_fetched = 0
+            before = None
+            page_error = None
+            
+            while pages_fetched < settings.max_pages_per_channel:
+                try:
+                    page = await self._fetch_page(base_url, channel, before, budget)
+                except Exception as e:
+                    if pages_fetched == 0:
+                        raise
+                    # Уже собранные посты канала не теряем из-за ошибки на одной из следующих страниц
+                    logger.warning(f"⚠️ {channel}: страница {pages_fetched + 1} (before={before}) не загружена: {e}; "
+                                   f"возвращаем {len(posts)} постов с предыдущих страниц")
+                    page_error = f"страница {pages_fetched + 1} не загружена: {e}"
+                    break
+                pages_fetched += 1
                 
-                # Если постов все еще нет, возможно канал требует авторизации или изменил структуру
-                if not post_elements:
-                    logger.warning(f"⚠️ Посты не найдены на странице {response.url}. Возможно, канал требует авторизации или изменил структуру.")
-                    # Проверяем, есть ли кнопка "View in Telegram" - это означает, что нужна авторизация
-                    view_button = soup.find('a', class_='tgme_action_button_new')
-                    if view_button:
-                        logger.info(f"🔒 Канал {channel} требует авторизации в Telegram для просмотра постов")
-                    return []
+                logger.info(f"🔍 Страница {pages_fetched}: найдено {page['elements_found']} элементов постов в HTML")
                 
-                post_count = 0
-                skipped_old = 0
-                skipped_no_time = 0
-                skipped_no_content = 0
+                # Если постов нет, возможно канал требует авторизации или изменил структуру
+                if not page["elements_found"]:
+                    if pages_fetched == 1:
+                        logger.warning(f"⚠️ Посты не найдены на странице {base_url}. Возможно, канал требует авторизации или изменил структуру.")
+                        if page["requires_auth"]:
+                            logger.info(f"🔒 Канал {channel} требует авторизации в Telegram для просмотра постов")
+                    break
                 
-                for element in post_elements[:limit]:
-                    try:
-                        # Извлекаем ID поста - пробуем разные способы
-                        post_link_elem = element.find('a', class_='tgme_widget_message_date')
-                        if not post_link_elem:
-                            # Пробуем другие селекторы для ссылки на пост
-                            post_link_elem = element.find('a', href=True)
-                        if not post_link_elem:
-                            continue
-                            
-                        post_link = post_link_elem.get('href', '')
-                        post_id = post_link.split('/')[-1] if post_link else str(post_count)
-                        
-                        # Извлекаем время - пробуем несколько способов
-                        post_time = None
-                        time_elem = element.find('time')
-                        
-                        if time_elem and time_elem.get('datetime'):
-                            datetime_str = time_elem['datetime']
-                            try:
-                                # Обрабатываем разные форматы времени
-                                if datetime_str.endswith('Z'):
-                                    post_time = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-                                elif '+' in datetime_str or datetime_str.endswith('00'):
-                                    post_time = datetime.fromisoformat(datetime_str)
-                                else:
-                                    # Если нет timezone info, считаем UTC
-                                    post_time = datetime.fromisoformat(datetime_str).replace(tzinfo=timezone.utc)
-                                    
-                                logger.debug(f"📅 Пост {post_id}: время {post_time.isoformat()}")
-                                
-                            except Exception as e:
-                                logger.warning(f"⚠️ Ошибка парсинга времени '{datetime_str}' для поста {post_id}: {e}")
-                                post_time = None
-                        
-                        # Если время не найдено, пропускаем пост
-                        if post_time is None:
-                            logger.debug(f"⏰ Пост {post_id}: время не найдено, пропускаем")
-                            skipped_no_time += 1
-                            continue
-                        
-                        # Проверяем время публикации
-                        if post_time < cutoff_time:
-                            logger.debug(f"🕒 Пост {post_id}: слишком старый ({post_time.isoformat()}), пропускаем")
-                            skipped_old += 1
-                            continue
-                        
-                        # Извлекаем текст поста - пробуем разные селекторы
-                        text_elem = element.find('div', class_='tgme_widget_message_text')
-                        if not text_elem:
-                            text_elem = element.find('div', class_='message_text')
-                        if not text_elem:
-                            text_elem = element.find('div', class_='post_content')
-                        
-                        post_text = self._extract_formatted_text(text_elem)
-                        
-                        # Проверяем наличие медиа - пробуем разные селекторы
-                        has_media = bool(
-                            element.find('a', class_='tgme_widget_message_photo_wrap') or 
-                                       element.find('video') or 
-                            element.find('div', class_='tgme_widget_message_video') or
-                            element.find('img') or
-                            element.find('div', class_='media')
-                        )
-                        
-                        # Добавляем только если есть содержательный текст
-                        # Медиа-посты без текста пропускаем, так как они не несут информационной ценности для кластеризации
-                        if post_text and len(post_text.strip()) > 10:  # Минимум 10 символов содержательного текста
-                            post = RawPost(
-                                id=f"{channel}_http_{post_id}_{int(post_time.timestamp())}",
-                                channel_name=channel,
-                                publication_datetime=post_time.isoformat(),
-                                post_link=post_link or f"https://t.me/{channel}/{post_id}",
-                                post_text=post_text,
-                                has_media=has_media
-                            )
-                            posts.append(post)
-                            post_count += 1
-                            logger.debug(f"✅ Пост {post_id}: добавлен ({post_time.isoformat()})")
-                        else:
-                            logger.debug(f"⏭️ Пост {post_id}: пропущен (нет содержательного текста)")
-                            skipped_no_content += 1
-                            
-                    except Exception as e:
-                        logger.warning(f"Ошибка обработки поста в канале {channel}: {e}")
+                # Проверяем время публикации
+                for record in page["posts"]:
+                    if record.timestamp < cutoff_timestamp:
+                        skipped_old += 1
                         continue
+                    posts[record.id] = RawPost(
+                        id=record.id,
+                        channel_name=record.channel_name,
+                        publication_datetime=record.publication_datetime,
+                        post_link=record.post_link,
+                        post_text=record.post_text,
+                        has_media=record.has_media
+                    )
+                skipped_no_time += page["skipped_no_time"]
+                skipped_no_content += page["skipped_no_content"]
                 
-                logger.info(f"✅ HTTP: найдено {post_count} актуальных постов в канале {channel}")
-                logger.info(f"📊 Статистика: пропущено старых: {skipped_old}, без времени: {skipped_no_time}, без содержательного текста: {skipped_no_content}")
-                return posts
+                # Дальше идут только более старые посты - останавливаемся
+                if page["oldest_post_time"] is not None and page["oldest_post_time"] < cutoff_time:
+                    break
+                if len(posts) >= limit:
+                    break
                 
+                next_before = page["oldest_post_id"]
+                if next_before is None or (before is not None and next_before >= before) or next_before <= 1:
+                    break
+                before = next_before
+        
+            # Оставляем самые свежие посты в пределах лимита
+            result = sorted(posts.values(), key=lambda x: datetime.fromisoformat(x.publication_datetime), reverse=True)[:limit]
+            
+            logger.info(f"✅ HTTP: найдено {len(result)} актуальных постов в канале {channel} (страниц: {pages_fetched})")
+            logger.info(f"📊 Статистика: пропущено старых: {skipped_old}, без времени: {skipped_no_time}, без содержательного текста: {skipped_no_content}")
+            if page_error is not None:
+                raise ChannelFetchError(page_error, result)
+            return result
+        
+        except ChannelFetchError:
+            raise
         except Exception as e:
             logger.warning(f"⚠️ HTTP парсинг не удался для канала {channel}: {e}")
-            return []
+            raise ChannelFetchError(str(e) or e.__class__.__name__) from e
     
-    async def parse_channel(self, channel: str, hours_back: int = 24, limit: int = 50) -> List[RawPost]:
+    async def parse_channel(self, channel: str, hours_back: int = 24, limit: int = 50,
+                            since_timestamp: Optional[float] = None, budget: Optional[ChannelBudget] = None) -> List[RawPost]:
         """Асинхронный парсинг одного канала"""
-        return await self._parse_channel_with_http(channel, hours_back, limit)
+        with CHANNEL_FETCH_SECONDS.labels(channel_labels.get(channel)).time():
+            return await self._parse_channel_with_http(channel, hours_back, limit, since_timestamp, budget)
     
-    async def parse_channels(self, channels: List[str], hours_back: int = 24, limit: int = 50) -> List[RawPost]:
-        """Асинхронный парсинг нескольких каналов"""
+    async def _parse_channel_with_timeout(self, channel: str, hours_back: int, limit: int,
+                                          since_timestamp: Optional[float] = None) -> List[RawPost]:
+        """Парсинг канала с ограничением времени запросов (без очереди к хосту), чтобы зависший канал не задерживал остальные"""
+        return await self.parse_channel(channel, hours_back, limit, since_timestamp, ChannelBudget(settings.channel_timeout_seconds))
+    
+    async def iter_channels(self, channels: List[str], hours_back: int = 24, limit: int = 50,
+                            since: Optional[Dict[str, float]] = None) -> AsyncIterator[Tuple[str, List[RawPost], Optional[str]]]:
+        """Парсинг каналов параллельно с выдачей результатов по мере готовности: (канал, посты, ошибка)"""
+        since = since or {}
+        
+        async def run(channel: str) -> Tuple[str, List[RawPost], Optional[str]]:
+            try:
+                return channel, await self._parse_channel_with_timeout(channel, hours_back, limit, since.get(channel)), None
+            except ChannelFetchError as e:
+                logger.error(f"❌ Ошибка при парсинге канала {channel}: {str(e)}")
+                return channel, e.posts, str(e)
+            except Exception as e:
+                logger.error(f"❌ Ошибка при парсинге канала {channel}: {str(e)}")
+                return channel, [], str(e)
+        
+        tasks = [asyncio.create_task(run(channel)) for channel in channels]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Клиент отключился - незавершенные загрузки не нужны
+            for task in tasks:
+                task.cancel()
+    
+    async def parse_channels(self, channels: List[str], hours_back: int = 24, limit: int = 50,
+                             since: Optional[Dict[str, float]] = None) -> List[RawPost]:
+        """Асинхронный парсинг нескольких каналов; since - отметки последних сохраненных постов по каналам"""
         logger.info(f"🚀 Начинаем парсинг {len(channels)} каналов...")
+        since = since or {}
         
         # Запускаем парсинг всех каналов параллельно
         tasks = [
-            self.parse_channel(channel, hours_back, limit) 
+            self._parse_channel_with_timeout(channel, hours_back, limit, since.get(channel)) 
             for channel in channels
         ]
         
@@ -204,7 +380,12 @@ class TelegramParser:
         failed_channels = 0
         
         for i, result in enumerate(results):
-            if isinstance(result, Exception):
+            if isinstance(result, ChannelFetchError) and result.posts:
+                # Канал загружен частично - посты с полученных страниц оставляем
+                logger.warning(f"⚠️ Канал {channels[i]} загружен не полностью ({result}): получено {len(result.posts)} постов")
+                all_posts.extend(result.posts)
+                failed_channels += 1
+            elif isinstance(result, Exception):
                 logger.error(f"❌ Критическая ошибка при парсинге канала {channels[i]}: {str(result)}")
                 failed_channels += 1
             elif len(result) == 0:
@@ -228,5 +409,5 @@ class TelegramParser:
         return all_posts
     
     def __del__(self):
-        if hasattr(self, 'executor'):
+        if getattr(self, 'executor', None) is not None:
             self.executor.shutdown(wait=True) 
\ No newline at end of file
@@ -0,0 +1,314 @@
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Индекс ближайших соседей по embeddings постов: IVF-flat на NumPy поверх memory-mapped матрицы"""
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+    IVF_FILE = "ivf.npz"
+
+    def __init__(self, index_dir: str, model_name: str, n_probe: int = 8, min_train_size: int = 1024,
+                 initial_capacity: int = 4096, flush_interval_seconds: float = 30.0):
+        self.model_name = model_name
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.initial_capacity = initial_capacity
+        # Идентификаторы и IVF переписываются на диск не чаще раза в flush_interval_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.index_dir = os.path.join(index_dir, re.sub(r"[^\w.-]+", "_", model_name))
+
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+        # IVF: центроиды списков и номер списка для каждой строки
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._trained_count = 0
+        self._dirty = False
+        self._flushed_at = 0.0
+
+        self._load()
+
+    def _vectors_path(self) -> str:
+        return os.path.join(self.index_dir, self.VECTORS_FILE)
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, self.META_FILE)
+
+    def _ivf_path(self) -> str:
+        return os.path.join(self.index_dir, self.IVF_FILE)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _load(self):
+        """Загрузка индекса с диска"""
+        try:
+            if not os.path.exists(self._meta_path()) or not os.path.exists(self._vectors_path()):
+                return
+
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("model") != self.model_name:
+                logger.info("🔄 Модель embeddings изменилась, индекс похожих постов будет пересоздан")
+                return
+
+            self._dim = int(meta["dim"])
+            self._capacity = int(meta["capacity"])
+            self._ids = meta["ids"]
+            self._count = len(self._ids)
+            self._rows = {post_id: row for row, post_id in enumerate(self._ids)}
+            self._vectors = np.memmap(self._vectors_path(), dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+
+            if os.path.exists(self._ivf_path()):
+                with np.load(self._ivf_path()) as ivf:
+                    self._centroids = ivf["centroids"]
+                    assignments = ivf["assignments"]
+                self._trained_count = int(meta.get("trained_count", len(assignments)))
+                if len(assignments) == self._count:
+                    self._assignments = assignments
+                else:
+                    # IVF сохранен не вместе с идентификаторами (строки могли сдвинуться при удалении) - распределяем все строки заново
+                    logger.info(f"🔄 Списки IVF не совпадают с индексом ({len(assignments)} из {self._count}), распределяем строки заново")
+                    self._assignments = self._assign(self._vectors[:self._count])
+                self._rebuild_lists()
+
+            logger.info(f"✅ Индекс похожих постов загружен: {self._count} векторов")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить индекс похожих постов, начинаем с пустого: {e}")
+            self._dim = None
+            self._capacity = 0
+            self._count = 0
+            self._vectors = None
+            self._ids = []
+            self._rows = {}
+            self._centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._lists = []
+            self._trained_count = 0
+
+    def _ensure_capacity(self, dim: int, required: int):
+        """Создание или расширение файла матрицы (удвоением)"""
+        if self._vectors is None or dim != self._dim:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._dim = dim
+            self._capacity = max(self.initial_capacity, required)
+            self._count = 0
+            self._ids = []
+            self._rows = {}
+            self._centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._lists = []
+            self._trained_count = 0
+            self._vectors = np.memmap(self._vectors_path(), dtype=np.float32, mode="w+", shape=(self._capacity, dim))
+            return
+
+        if required <= self._capacity:
+            return
+
+        new_capacity = self._capacity
+        while new_capacity < required:
+            new_capacity *= 2
+        self._vectors.flush()
+        self._vectors = None
+        with open(self._vectors_path(), "r+b") as f:
+            f.truncate(new_capacity * self._dim * np.dtype(np.float32).itemsize)
+        self._capacity = new_capacity
+        self._vectors = np.memmap(self._vectors_path(), dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Номер ближайшего IVF-списка для каждого вектора"""
+        if self._centroids is None or len(vectors) == 0:
+            return np.zeros(len(vectors), dtype=np.int32)
+        parts = [
+            np.argmax(np.asarray(vectors[start:start + chunk_size]) @ self._centroids.T, axis=1).astype(np.int32)
+            for start in range(0, len(vectors), chunk_size)
+        ]
+        return np.concatenate(parts)
+
+    def _rebuild_lists(self):
+        """Инвертированные списки: номер списка -> строки матрицы"""
+        if self._centroids is None:
+            self._lists = []
+            return
+        order = np.argsort(self._assignments, kind="stable")
+        bounds = np.searchsorted(self._assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+
+    def _train(self):
+        """Обучение центроидов IVF на текущих векторах"""
+        n_lists = max(1, int(np.sqrt(self._count)))
+        vectors = np.asarray(self._vectors[:self._count])
+        sample_size = min(self._count, n_lists * 256)
+        if sample_size < self._count:
+            sample = vectors[np.random.default_rng(42).choice(self._count, sample_size, replace=False)]
+        else:
+            sample = vectors
+
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=42, n_init=3, batch_size=4096)
+        kmeans.fit(sample)
+        self._centroids = self._normalize(kmeans.cluster_centers_)
+        self._assignments = self._assign(vectors)
+        self._trained_count = self._count
+        self._rebuild_lists()
+        logger.info(f"🧭 Индекс похожих постов переобучен: {self._count} векторов, {n_lists} списков")
+
+    def add(self, post_ids: List[str], embeddings: np.ndarray):
+        """Добавление (или обновление) векторов постов"""
+        if not post_ids:
+            return
+        vectors = self._normalize(embeddings)
+
+        with self._lock:
+            self._ensure_capacity(vectors.shape[1], self._count + len(post_ids))
+
+            new_rows = []
+            for post_id, vector in zip(post_ids, vectors):
+                row = self._rows.get(post_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._ids.append(post_id)
+                    self._rows[post_id] = row
+                    new_rows.append(row)
+                self._vectors[row] = vector
+
+            if self._count >= self.min_train_size and self._count >= 2 * self._trained_count:
+                self._train()
+            elif self._centroids is not None:
+                # Обновленные векторы могли сменить список - распределяем измененные строки заново
+                rows = np.array([self._rows[post_id] for post_id in post_ids], dtype=np.int64)
+                self._assignments = np.concatenate([self._assignments, np.zeros(len(new_rows), dtype=np.int32)])
+                self._assignments[rows] = self._assign(self._vectors[rows])
+                self._rebuild_lists()
+            self._dirty = True
+
+        self._flush_if_due()
+
+    def remove(self, post_ids: List[str]) -> int:
+        """Удаление векторов постов: на место удаленной строки переносится последняя"""
+        removed = 0
+        with self._lock:
+            for post_id in post_ids:
+                row = self._rows.pop(post_id, None)
+                if row is None:
+                    continue
+                last = self._count - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = moved_id
+                    self._rows[moved_id] = row
+                    if self._centroids is not None:
+                        self._assignments[row] = self._assignments[last]
+                self._ids.pop()
+                self._count -= 1
+                removed += 1
+
+            if removed and self._centroids is not None:
+                self._assignments = self._assignments[:self._count]
+                self._rebuild_lists()
+            if removed:
+                self._dirty = True
+
+        if removed:
+            self._flush_if_due()
+            logger.info(f"🧹 Удалено векторов из индекса похожих постов: {removed}")
+        return removed
+
+    def get_vector(self, post_id: str) -> Optional[np.ndarray]:
+        """Сохраненный вектор поста"""
+        with self._lock:
+            row = self._rows.get(post_id)
+            return None if row is None else np.array(self._vectors[row])
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k похожих постов по косинусной близости"""
+        query = self._normalize(query)[0]
+        exclude = set(exclude or [])
+
+        with self._lock:
+            if self._count == 0 or query.shape[0] != self._dim:
+                return []
+
+            if self._centroids is None:
+                rows = np.arange(self._count)
+            else:
+                # Просматриваем только n_probe ближайших списков
+                n_probe = min(self.n_probe, len(self._centroids))
+                probe = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+                rows = np.concatenate([self._lists[i] for i in probe])
+
+            if len(rows) == 0:
+                return []
+            scores = np.asarray(self._vectors[rows]) @ query
+            ids = self._ids
+
+        top = min(k + len(exclude), len(rows))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        results = [(ids[rows[i]], float(scores[i])) for i in best if ids[rows[i]] not in exclude]
+        return results[:k]
+
+    def _flush_if_due(self):
+        """Сохранение на диск, если с прошлого сохранения прошло flush_interval_seconds"""
+        if time.time() - self._flushed_at >= self.flush_interval_seconds:
+            self.flush()
+
+    def flush(self):
+        """Сохранение матрицы, идентификаторов и IVF на диск"""
+        with self._lock:
+            if self._vectors is None or not self._dirty:
+                return
+            self._dirty = False
+            self._flushed_at = time.time()
+            self._vectors.flush()
+            meta = {
+                "model": self.model_name,
+                "dim": self._dim,
+                "capacity": self._capacity,
+                "trained_count": self._trained_count,
+                "ids": self._ids,
+            }
+            tmp_path = self._meta_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._meta_path())
+
+            if self._centroids is not None:
+                tmp_path = self._ivf_path() + ".tmp.npz"
+                np.savez(tmp_path, centroids=self._centroids, assignments=self._assignments)
+                os.replace(tmp_path, self._ivf_path())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_stats(self) -> dict:
+        """Статистика индекса"""
+        return {
+            "vectors": self._count,
+            "capacity": self._capacity,
+            "lists": 0 if self._centroids is None else len(self._centroids),
+            "n_probe": self.n_probe,
+        }